@@ -26,6 +26,9 @@ st.markdown(
 5.  **Redimensionador de Imagens**: Ferramenta em lote para ajustar resolução de imagens.
 6.  **Transcritor de Áudio e Resumo**: Transcreve arquivos de áudio e gera um resumo consolidado usando IA (OpenAI).
 7.  **Conversor de DOCX para MD**: Converte arquivos Word (.docx) para Markdown (.md) de forma rápida e automática.
+8.  **Localizador de Duplicatas**: Encontra arquivos com conteúdo idêntico em uma árvore de pastas.
+9.  **Busca em PDFs**: Indexa PDFs e encontra palavras-chave em todo o acervo, com a página de cada ocorrência.
+10. **Compressor de PDF**: Reduz o tamanho de PDFs reamostrando as imagens embutidas.
 """
 )
 
@@ -0,0 +1,84 @@
+"""
+Benchmark: redimensionamento de JPEGs grandes com e sem decodificação reduzida.
+
+Compara o caminho antigo (decodificação completa + LANCZOS) com
+`process_image_resize` (`Image.draft` + `reducing_gap`) em velocidade e em
+qualidade, medida por SSIM entre as duas saídas (1.0 = idênticas).
+
+Uso:
+    python benchmarks/bench_image_resize.py --size 7360x5520 --percent 10 25 50
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageFilter  # noqa: E402
+
+from utils.image_tools import _ssim, calculate_new_dimensions, process_image_resize  # noqa: E402
+
+
+def build_photo(width, height):
+    """JPEG sintético com bordas, gradientes e textura, parecido com uma foto."""
+    base = Image.merge(
+        "RGB",
+        [
+            Image.linear_gradient("L").resize((width, height)),
+            Image.radial_gradient("L").resize((width, height)),
+            Image.effect_noise((width // 8, height // 8), 80).resize((width, height), Image.Resampling.BICUBIC),
+        ],
+    )
+    texture = Image.effect_noise((width, height), 25).filter(ImageFilter.GaussianBlur(1))
+    img = Image.blend(base, Image.merge("RGB", [texture] * 3), 0.25)
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=92)
+    return buf.getvalue()
+
+
+def legacy_resize(data, percent):
+    """Caminho anterior: decodificação completa e LANCZOS direto."""
+    img = Image.open(io.BytesIO(data))
+    new_w, new_h = calculate_new_dimensions(img.width, img.height, "Porcentagem (%)", percent)
+    img = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+
+def ssim(a_bytes, b_bytes):
+    return _ssim(Image.open(io.BytesIO(a_bytes)), Image.open(io.BytesIO(b_bytes)))
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return out, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="7360x5520", help="tamanho da foto sintética (40 MP por padrão)")
+    parser.add_argument("--percent", type=int, nargs="+", default=[10, 25, 50])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    width, height = (int(x) for x in args.size.lower().split("x"))
+    photo = build_photo(width, height)
+    print(f"Foto {width}x{height} ({len(photo) / 1024 ** 2:.1f} MB JPEG)")
+    print(f"{'%':>4} {'antigo (s)':>11} {'novo (s)':>9} {'speedup':>8} {'SSIM':>7}")
+
+    for percent in args.percent:
+        old, t_old = timed(lambda: legacy_resize(photo, percent), args.repeat)
+        new, t_new = timed(lambda: process_image_resize(io.BytesIO(photo), "Porcentagem (%)", percent)[0], args.repeat)
+        print(f"{percent:>4} {t_old:>11.3f} {t_new:>9.3f} {t_old / t_new:>7.1f}x {ssim(old, new):>7.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: unificação de PDFs com PyPDF2 vs. PyMuPDF.
+
+Gera vários PDFs que repetem o mesmo logotipo (imagem) em todas as páginas,
+como acontece com relatórios do mesmo modelo, e compara tempo e tamanho
+final de `merge_pdf_bytes` com cada motor.
+
+Uso:
+    python benchmarks/bench_pdf_merge.py --files 30 --pages 10
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from utils.pdf_tools import MERGE_ENGINES, merge_pdf_bytes  # noqa: E402
+
+
+def build_logo():
+    """Imagem com ruído (pouco compressível), usada como logotipo repetido."""
+    img = Image.effect_noise((400, 200), 64).convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, "PNG")
+    return buf.getvalue()
+
+
+def build_pdf(pages, logo):
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page(width=595, height=842)
+        page.insert_image(fitz.Rect(40, 40, 240, 140), stream=logo)
+        for row in range(30):
+            page.insert_text((40, 180 + row * 20), f"Relatório - página {n + 1}, linha {row + 1}", fontsize=10)
+    data = doc.tobytes(deflate=True)
+    doc.close()
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=10)
+    args = parser.parse_args()
+
+    logo = build_logo()
+    inputs = [build_pdf(args.pages, logo) for _ in range(args.files)]
+    total_in = sum(len(b) for b in inputs)
+    print(f"{args.files} arquivos x {args.pages} páginas, entrada total {total_in / 1024:.0f} KB")
+    print(f"{'motor':>8} {'tempo (s)':>10} {'saída (KB)':>11}")
+
+    for engine in MERGE_ENGINES:
+        files = [io.BytesIO(b) for b in inputs]
+        start = time.perf_counter()
+        merged = merge_pdf_bytes(files, engine=engine)
+        elapsed = time.perf_counter() - start
+        print(f"{engine:>8} {elapsed:>10.3f} {len(merged) / 1024:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
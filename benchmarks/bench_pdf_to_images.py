@@ -0,0 +1,59 @@
+"""
+Benchmark: conversão de PDF para imagens com diferentes números de processos.
+
+Gera um PDF sintético (texto e formas vetoriais) e mede o tempo de
+`convert_pdf_to_images` para cada quantidade de workers.
+
+Uso:
+    python benchmarks/bench_pdf_to_images.py --pages 60 --dpi 200 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # noqa: E402
+
+from utils.pdf_tools import convert_pdf_to_images  # noqa: E402
+
+
+def build_pdf(pages):
+    """Cria um PDF A4 com texto e formas coloridas em cada página."""
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page(width=595, height=842)
+        for row in range(40):
+            page.insert_text((40, 40 + row * 19), f"Página {n + 1} - linha {row + 1} " * 3, fontsize=9)
+        for k in range(12):
+            rect = fitz.Rect(40 + k * 42, 700, 75 + k * 42, 800)
+            page.draw_rect(rect, color=(0, 0, 0), fill=(k / 12, 0.4, 1 - k / 12))
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--dpi", type=int, default=150)
+    parser.add_argument("--format", default="PNG", choices=["PNG", "JPEG"])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    pdf_bytes = build_pdf(args.pages)
+    print(f"{args.pages} páginas, {args.dpi} DPI, {args.format}, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'tempo (s)':>10} {'pág/s':>8} {'speedup':>8}")
+
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        start = time.perf_counter()
+        convert_pdf_to_images(pdf_bytes, args.format, args.dpi, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>10.2f} {args.pages / elapsed:>8.1f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
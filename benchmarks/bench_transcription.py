@@ -0,0 +1,102 @@
+"""
+Benchmark: transcrição de vários áudios, em série vs. concorrente.
+
+Sobe um servidor HTTP local que imita o endpoint de transcrição da OpenAI
+(latência fixa por requisição e um 429 a cada N chamadas) e aponta o
+cliente compartilhado para ele via `base_url`. Não usa a API real nem
+precisa de chave válida.
+
+Uso:
+    python benchmarks/bench_transcription.py --files 20 --latency 0.5 --concurrency 1 4 8
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import audio_tools  # noqa: E402
+from utils.audio_tools import transcribe_audio_files  # noqa: E402
+
+
+class StubState:
+    def __init__(self, latency, fail_every):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.calls = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with state.lock:
+                state.calls += 1
+                throttle = state.fail_every and state.calls % state.fail_every == 0
+                if throttle:
+                    state.throttled += 1
+
+            if throttle:
+                body = json.dumps({"error": {"message": "Rate limit", "type": "rate_limit"}}).encode()
+                self.send_response(429)
+                self.send_header("Retry-After", "0.05")
+            else:
+                time.sleep(state.latency)
+                body = json.dumps({"text": f"transcrição {state.calls}"}).encode()
+                self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class FakeUpload(io.BytesIO):
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5, help="latência simulada por requisição (s)")
+    parser.add_argument("--fail-every", type=int, default=7, help="responde 429 a cada N requisições (0 = nunca)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    state = StubState(args.latency, args.fail_every)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+
+    # Espera curta entre tentativas para não dominar a medição
+    audio_tools.BACKOFF_BASE = 0.05
+    uploads = [FakeUpload(os.urandom(64 * 1024), f"audio_{i}.mp3") for i in range(args.files)]
+
+    print(f"{args.files} arquivos, latência {args.latency}s, 429 a cada {args.fail_every} chamadas")
+    print(f"{'concorrência':>12} {'tempo (s)':>10} {'falhas':>7} {'429s':>5}")
+    for concurrency in args.concurrency:
+        state.calls = state.throttled = 0
+        start = time.perf_counter()
+        results = list(transcribe_audio_files(uploads, "sk-teste", concurrency, base_url=base_url))
+        elapsed = time.perf_counter() - start
+        failures = sum(1 for _, _, error in results if error is not None)
+        print(f"{concurrency:>12} {elapsed:>10.2f} {failures:>7} {state.throttled:>5}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: árvore serial vs. paralela num sistema de arquivos lento (simulado).
+
+Cada listagem de pasta espera `--latency` segundos antes de ler o disco,
+imitando o round-trip de uma montagem NFS/SMB.
+
+Uso:
+    python benchmarks/bench_tree_walk.py --latency 0.005 --workers 1 4 8 16
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.file_system import scan_dir, get_tree_structure  # noqa: E402
+
+
+class SlowLister:
+    """Listador com latência artificial (mesmo contrato de `DirIndex.list_dir`)."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def list_dir(self, path):
+        time.sleep(self.latency)
+        return scan_dir(path)
+
+
+def build_tree(root, depth, fanout, files_per_dir):
+    """Cria uma árvore sintética com `fanout` subpastas por nível."""
+    dirs = [root]
+    for _ in range(depth):
+        next_level = []
+        for d in dirs:
+            for i in range(fanout):
+                sub = os.path.join(d, f"dir_{i:02d}")
+                os.mkdir(sub)
+                next_level.append(sub)
+            for j in range(files_per_dir):
+                open(os.path.join(d, f"file_{j:02d}.txt"), "w").close()
+        dirs = next_level
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.005, help="latência por listagem (s)")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--fanout", type=int, default=5)
+    parser.add_argument("--files", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "root")
+        os.mkdir(root)
+        build_tree(root, args.depth, args.fanout, args.files)
+        lister = SlowLister(args.latency)
+        reference = get_tree_structure(root, max_depth=args.depth + 1, max_items=1000)
+
+        print(f"{len(reference)} linhas, latência {args.latency * 1000:.1f} ms/listagem")
+        print(f"{'workers':>8} {'tempo (s)':>10} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            lines = get_tree_structure(root, max_depth=args.depth + 1, max_items=1000, cache=lister, workers=workers)
+            elapsed = time.perf_counter() - start
+            assert lines == reference, f"saída divergente com workers={workers}"
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>10.3f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import streamlit as st
+import os
+
+from utils.file_system import format_size
+from utils.pdf_tools import compress_pdf_bytes
+from utils.ui import render_footer
+
+st.set_page_config(page_title="Compressor de PDF", page_icon="🗜️", layout="wide")
+st.title("🗜️ Compressor de PDF")
+st.markdown(
+    "Reduz o tamanho de PDFs (como pacotes de digitalizações unificados) reamostrando as imagens embutidas."
+)
+
+uploaded_file = st.file_uploader("Escolha um arquivo PDF", type="pdf")
+
+if uploaded_file:
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        target_dpi = st.select_slider(
+            "Resolução máxima das imagens (DPI)",
+            options=[72, 96, 120, 150, 200, 300],
+            value=150,
+            help="Imagens exibidas acima desta resolução são reduzidas.",
+        )
+    with col2:
+        quality = st.slider("Qualidade JPEG", 40, 95, 75, 5)
+    with col3:
+        max_workers = os.cpu_count() or 1
+        workers = st.slider("⚙️ Processos em paralelo", 1, max_workers, min(4, max_workers))
+
+    if st.button("Comprimir PDF 🚀", type="primary"):
+        with st.spinner("Analisando e recomprimindo imagens..."):
+            try:
+                progress_bar = st.progress(0)
+
+                def atualizar_progresso(feitas, total):
+                    progress_bar.progress(feitas / total, text=f"Imagem {feitas}/{total}")
+
+                pdf_out, stats = compress_pdf_bytes(
+                    uploaded_file.getvalue(),
+                    target_dpi=target_dpi,
+                    jpeg_quality=quality,
+                    workers=workers,
+                    on_progress=atualizar_progresso,
+                )
+                progress_bar.empty()
+
+                original = stats["tamanho_original"]
+                final = stats["tamanho_final"]
+                reducao = (1 - final / original) * 100 if original else 0
+
+                st.success(
+                    f"🎉 {stats['reduzidas']} de {stats['imagens']} imagem(ns) reduzidas. "
+                    f"{format_size(original)} → {format_size(final)} (-{reducao:.0f}%)"
+                )
+
+                st.download_button(
+                    label="⬇️ Baixar PDF Comprimido",
+                    data=pdf_out,
+                    file_name=f"{os.path.splitext(uploaded_file.name)[0]}_comprimido.pdf",
+                    mime="application/pdf",
+                )
+
+            except Exception as e:
+                st.error(f"❌ Erro na compressão: {e}")
+else:
+    st.info("📄 Por favor, carregue um arquivo PDF para começar.")
+
+render_footer()
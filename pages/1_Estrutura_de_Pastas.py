@@ -1,7 +1,12 @@
 import streamlit as st
 import os
 
-from utils.file_system import get_tree_structure, get_default_path
+from utils.file_system import (
+    spool_tree_structure,
+    read_spooled_page,
+    get_default_path,
+)
+from utils.dir_index import get_dir_index
 from utils.ui import render_footer
 
 st.set_page_config(page_title="Estrutura de Pastas", page_icon="📁", layout="wide")
@@ -24,6 +29,33 @@ use_icons = st.checkbox(
     help="Adiciona ícones baseados na extensão do arquivo",
 )
 
+# Toggle para o índice persistente
+use_cache = st.checkbox(
+    "⚡ Usar índice em cache",
+    value=True,
+    help="Reaproveita listagens salvas em disco; só pastas modificadas são relidas.",
+)
+
+# Modo uso de disco (estilo du)
+disk_usage = st.checkbox(
+    "💾 Mostrar tamanho das pastas",
+    value=False,
+    help="Exibe tamanho total e número de arquivos de cada pasta (lê a árvore inteira).",
+)
+sort_by_size = False
+if disk_usage:
+    sort_by_size = st.checkbox("⬇️ Ordenar por tamanho (maiores primeiro)", value=True)
+
+workers = st.slider(
+    "🧵 Leituras simultâneas",
+    min_value=1,
+    max_value=32,
+    value=1,
+    help="Lista subpastas em paralelo. Acelera pastas de rede (NFS/SMB); em disco local, 1 costuma bastar.",
+)
+
+LINHAS_POR_PAGINA = 500
+
 if st.button("Visualizar Estrutura 🔍", type="primary"):
     if not caminho_input:
         st.warning("Por favor, insira um caminho.")
@@ -32,19 +64,74 @@ if st.button("Visualizar Estrutura 🔍", type="primary"):
     elif not os.path.isdir(caminho_input):
         st.error(f"❌ Não é uma pasta válida: `{caminho_input}`")
     else:
-        st.success(f"📂 Lendo: `{os.path.abspath(caminho_input)}`")
+        # Descarta a árvore anterior (e seu arquivo temporário)
+        anterior = st.session_state.pop("estrutura_spool", None)
+        if anterior:
+            anterior["arquivo"].close()
 
-        with st.spinner("Gerando árvore..."):
-            estrutura = get_tree_structure(caminho_input, use_icons=use_icons)
-            texto_estrutura = "\n".join(estrutura)
+        status = st.empty()
+        preview = st.empty()
+
+        def atualizar_progresso(total, primeira_pagina):
+            status.info(f"⏳ Gerando árvore... {total} linhas")
+            preview.code("\n".join(primeira_pagina), language="text")
+
+        indice = get_dir_index() if use_cache else None
+
+        # As linhas vão direto para um arquivo temporário: memória limitada
+        arquivo, offsets, total = spool_tree_structure(
+            caminho_input,
+            page_size=LINHAS_POR_PAGINA,
+            on_progress=atualizar_progresso,
+            use_icons=use_icons,
+            cache=indice,
+            workers=workers,
+            disk_usage=disk_usage,
+            sort_by_size=sort_by_size,
+        )
+        if indice:
+            indice.commit()
+        status.empty()
+        preview.empty()
+
+        st.session_state["estrutura_spool"] = {
+            "caminho": os.path.abspath(caminho_input),
+            "arquivo": arquivo,
+            "offsets": offsets,
+            "total": total,
+        }
+
+resultado = st.session_state.get("estrutura_spool")
+if resultado:
+    st.success(f"📂 Lendo: `{resultado['caminho']}` ({resultado['total']} linhas)")
+
+    total_paginas = len(resultado["offsets"])
+    pagina = 1
+    if total_paginas > 1:
+        pagina = st.number_input(
+            f"Página (1-{total_paginas})",
+            min_value=1,
+            max_value=total_paginas,
+            value=1,
+            step=1,
+        )
 
-        st.code(texto_estrutura, language="text")
+    st.code(
+        read_spooled_page(resultado["arquivo"], resultado["offsets"], pagina - 1),
+        language="text",
+    )
 
+    # O download_button do Streamlit exige bytes: o arquivo inteiro só é lido
+    # quando o download é pedido, não a cada troca de página
+    if st.button("📄 Preparar download (.txt)"):
+        resultado["arquivo"].seek(0)
         st.download_button(
             label="⬇️ Baixar txt",
-            data=texto_estrutura,
+            data=resultado["arquivo"].read(),
             file_name="estrutura_pastas.txt",
             mime="text/plain",
+            on_click="ignore",
         )
+        resultado["arquivo"].seek(0)
 
 render_footer()
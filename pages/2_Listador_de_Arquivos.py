@@ -1,8 +1,21 @@
 import streamlit as st
+import os
+from datetime import datetime, time
 
-from utils.file_system import list_files_in_dir, get_default_path
+import pandas as pd
+
+from utils.file_system import (
+    list_files_in_dir,
+    iter_files,
+    export_file_list,
+    format_mtime,
+    get_default_path,
+)
+from utils.dir_index import get_dir_index
 from utils.ui import render_footer
 
+LINHAS_PREVIEW = 200
+
 st.set_page_config(page_title="Listador de Arquivos", page_icon="📄", layout="wide")
 st.title("📄 Listador de Arquivos")
 st.markdown("Gera uma lista simples de arquivos contidos em uma pasta.")
@@ -14,11 +27,94 @@ caminho_input = st.text_input("Caminho da Pasta", value=default_path)
 if caminho_input:
     caminho_input = caminho_input.strip().strip('"').strip("'")
 
+recursivo = st.checkbox(
+    "🔁 Modo recursivo com filtros",
+    value=False,
+    help="Inclui subpastas, permite filtrar e exporta tamanho e data em CSV/JSONL.",
+)
+
+if recursivo:
+    with st.expander("🔎 Filtros", expanded=True):
+        col1, col2 = st.columns(2)
+        with col1:
+            padrao = st.text_input("Padrão do nome (glob)", value="", placeholder="*.log")
+            extensoes_txt = st.text_input("Extensões", value="", placeholder=".py, .md")
+            formato = st.selectbox("Formato de exportação", ["CSV", "JSONL"])
+        with col2:
+            tam_min_kb = st.number_input("Tamanho mínimo (KB)", min_value=0, value=0, step=100)
+            tam_max_kb = st.number_input(
+                "Tamanho máximo (KB, 0 = sem limite)", min_value=0, value=0, step=100
+            )
+            periodo = st.date_input("Modificado entre", value=(), help="Deixe vazio para não filtrar.")
+else:
+    use_cache = st.checkbox(
+        "⚡ Usar índice em cache",
+        value=True,
+        help="Reaproveita a listagem salva em disco se a pasta não mudou.",
+    )
+
 if st.button("Listar Arquivos 📝", type="primary"):
     if not caminho_input:
         st.warning("Por favor, insira um caminho.")
+    elif recursivo:
+        if not os.path.isdir(caminho_input):
+            st.error(f"❌ '{caminho_input}' não é um diretório válido.")
+        else:
+            extensoes = [e.strip() for e in extensoes_txt.split(",") if e.strip()]
+            min_mtime = max_mtime = None
+            if len(periodo) == 2:
+                min_mtime = datetime.combine(periodo[0], time.min).timestamp()
+                max_mtime = datetime.combine(periodo[1], time.max).timestamp()
+
+            linhas = iter_files(
+                caminho_input,
+                pattern=padrao or None,
+                extensions=extensoes or None,
+                min_size=tam_min_kb * 1024 if tam_min_kb else None,
+                max_size=tam_max_kb * 1024 if tam_max_kb else None,
+                min_mtime=min_mtime,
+                max_mtime=max_mtime,
+            )
+
+            # Guarda só as primeiras linhas para a pré-visualização
+            preview = []
+
+            def com_preview(rows):
+                for row in rows:
+                    if len(preview) < LINHAS_PREVIEW:
+                        preview.append(row)
+                    yield row
+
+            status = st.empty()
+            arquivo, total = export_file_list(
+                com_preview(linhas),
+                fmt=formato.lower(),
+                on_progress=lambda n: status.info(f"⏳ {n} arquivo(s) listados..."),
+            )
+            status.empty()
+
+            st.success(f"✅ Sucesso! {total} arquivo(s) encontrados.")
+            if preview:
+                df = pd.DataFrame(preview, columns=["Caminho", "Tamanho (bytes)", "Modificado em"])
+                # Mesmo formato (hora local) do arquivo exportado
+                df["Modificado em"] = df["Modificado em"].map(format_mtime)
+                st.caption(f"Pré-visualização das primeiras {len(preview)} linhas")
+                st.dataframe(df, hide_index=True, use_container_width=True)
+
+            # O download_button do Streamlit exige bytes: o arquivo só é lido aqui
+            ext = formato.lower()
+            st.download_button(
+                label=f"⬇️ Baixar Lista (.{ext})",
+                data=arquivo.read(),
+                file_name=f"lista_arquivos.{ext}",
+                mime="text/csv" if ext == "csv" else "application/x-ndjson",
+            )
+            arquivo.close()
     else:
-        files, report, error = list_files_in_dir(caminho_input)
+        indice = get_dir_index() if use_cache else None
+        files, report, error = list_files_in_dir(caminho_input, cache=indice)
+        if indice:
+            indice.commit()
 
         if error:
             st.error(f"❌ {error}")
@@ -1,7 +1,11 @@
 import streamlit as st
+import os
+import tempfile
+
 import pandas as pd
 
-from utils.pdf_tools import merge_pdf_bytes
+from utils.pdf_tools import merge_pdf_bytes, merge_pdf_to_file
+from utils.result_cache import get_result_cache
 from utils.ui import render_footer
 
 st.set_page_config(page_title="Unificador de PDFs", page_icon="🔗", layout="wide")
@@ -46,6 +50,28 @@ if uploaded_files:
         key="pdf_order_editor",
     )
 
+    motor = st.radio(
+        "Motor de unificação",
+        [
+            "PyMuPDF (rápido, remove recursos duplicados)",
+            "PyPDF2 (compatibilidade)",
+            "Econômico (lotes muito grandes, grava em disco)",
+        ],
+        horizontal=True,
+    )
+    if motor.startswith("PyMuPDF"):
+        engine = "pymupdf"
+    elif motor.startswith("PyPDF2"):
+        engine = "pypdf2"
+    else:
+        engine = "disco"
+
+    use_cache = st.checkbox(
+        "⚡ Reutilizar resultados em cache",
+        value=True,
+        help="Se os mesmos arquivos já foram unificados com o mesmo motor, o resultado vem do disco.",
+    )
+
     # Botão de Ação
     if st.button("Unificar PDFs nesta Ordem 🚀", type="primary"):
         # Validação de Unicidade
@@ -54,6 +80,7 @@ if uploaded_files:
                 "❌ Erro: Existem números de ordem repetidos. Por favor, use uma sequência única (ex: 1, 2, 3...)."
             )
         else:
+            merged_path = None
             with st.spinner("Processando unificação..."):
                 try:
                     # 2. Reordenar baseada na edição do usuário
@@ -64,19 +91,46 @@ if uploaded_files:
                     ordered_files = [files_map[name] for name in ordered_names]
 
                     # 4. Unificar
-                    merged_pdf = merge_pdf_bytes(ordered_files)
+                    cache = get_result_cache() if use_cache else None
+                    if engine == "disco":
+                        progress_bar = st.progress(0)
+                        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp_pdf:
+                            merged_path = tmp_pdf.name
+                        merge_pdf_to_file(
+                            ordered_files,
+                            merged_path,
+                            on_progress=lambda feitos, total: progress_bar.progress(feitos / total),
+                            cache=cache,
+                        )
+                        progress_bar.empty()
+                    else:
+                        merged_pdf = merge_pdf_bytes(ordered_files, engine=engine, cache=cache)
 
                     st.success("🎉 PDFs unificados com sucesso!")
 
-                    st.download_button(
-                        label="⬇️ Baixar PDF Unificado",
-                        data=merged_pdf,
-                        file_name="pdf_unificado.pdf",
-                        mime="application/pdf",
-                    )
+                    if engine == "disco":
+                        # Servido direto do arquivo temporário
+                        with open(merged_path, "rb") as merged_file:
+                            st.download_button(
+                                label="⬇️ Baixar PDF Unificado",
+                                data=merged_file,
+                                file_name="pdf_unificado.pdf",
+                                mime="application/pdf",
+                            )
+                    else:
+                        st.download_button(
+                            label="⬇️ Baixar PDF Unificado",
+                            data=merged_pdf,
+                            file_name="pdf_unificado.pdf",
+                            mime="application/pdf",
+                        )
 
                 except Exception as e:
                     st.error(f"❌ Erro na unificação: {e}")
+                finally:
+                    # Garante limpeza
+                    if merged_path and os.path.exists(merged_path):
+                        os.remove(merged_path)
 else:
     st.warning("Por favor, carregue um ou mais arquivos PDF.")
 
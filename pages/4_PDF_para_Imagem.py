@@ -1,9 +1,32 @@
 import streamlit as st
+import hashlib
 import os
+import tempfile
 
-from utils.pdf_tools import convert_pdf_to_images
+from utils.pdf_tools import convert_pdf_to_images, count_pages, parse_page_range, render_thumbnails
+from utils.result_cache import get_result_cache
 from utils.ui import render_footer
 
+MINIATURAS_POR_PAGINA = 24
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def contar_paginas(doc_hash, _pdf_bytes):
+    """Número de páginas, em cache por documento (hash do conteúdo)."""
+    return count_pages(_pdf_bytes)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def gerar_miniaturas(doc_hash, bloco, _total_doc, _pdf_bytes):
+    """
+    Miniaturas em baixa resolução de um bloco do grid, em cache por
+    (documento, bloco): só o bloco visível é renderizado.
+    """
+    inicio = bloco * MINIATURAS_POR_PAGINA
+    paginas = range(inicio, min(inicio + MINIATURAS_POR_PAGINA, _total_doc))
+    return render_thumbnails(_pdf_bytes, pages=paginas)
+
+
 st.set_page_config(page_title="PDF para Imagem", page_icon="🖼️", layout="wide")
 st.title("🖼️ Conversor de PDF para Imagem")
 st.markdown("Converte cada página de um arquivo PDF em imagens de alta qualidade.")
@@ -11,22 +34,77 @@ st.markdown("Converte cada página de um arquivo PDF em imagens de alta qualidad
 uploaded_file = st.file_uploader("Escolha um arquivo PDF", type="pdf")
 
 if uploaded_file:
+    # Ler bytes do arquivo
+    pdf_bytes = uploaded_file.getvalue()
+    doc_hash = hashlib.sha256(pdf_bytes).hexdigest()
+
+    total_doc = contar_paginas(doc_hash, pdf_bytes)
+
+    with st.expander(f"👀 Miniaturas ({total_doc} páginas)", expanded=total_doc <= MINIATURAS_POR_PAGINA):
+        bloco = 0
+        if total_doc > MINIATURAS_POR_PAGINA:
+            total_blocos = (total_doc + MINIATURAS_POR_PAGINA - 1) // MINIATURAS_POR_PAGINA
+            bloco = st.number_input("Bloco de miniaturas", 1, total_blocos, 1) - 1
+        inicio = bloco * MINIATURAS_POR_PAGINA
+        with st.spinner("Gerando miniaturas..."):
+            miniaturas = gerar_miniaturas(doc_hash, bloco, total_doc, pdf_bytes)
+        cols = st.columns(8)
+        for idx, thumb in enumerate(miniaturas):
+            with cols[idx % 8]:
+                st.image(thumb, caption=f"Pág. {inicio + idx + 1}")
+
+    selecao = st.text_input(
+        "Páginas a converter",
+        value="",
+        placeholder="Ex: 1-3,10,20-25 (vazio = todas)",
+    )
+
     col1, col2 = st.columns(2)
     with col1:
         formato = st.selectbox("Formato da Imagem", ["PNG", "JPEG"])
     with col2:
         dpi = st.slider("Resolução (DPI)", 72, 300, 150, 10)
 
+    max_workers = os.cpu_count() or 1
+    workers = st.slider(
+        "⚙️ Processos em paralelo",
+        1,
+        max_workers,
+        min(4, max_workers),
+        help="Renderiza páginas em paralelo. Útil para PDFs longos ou DPI alto.",
+    )
+
+    use_cache = st.checkbox(
+        "⚡ Reutilizar resultados em cache",
+        value=True,
+        help="Conversões já feitas com o mesmo PDF, formato, DPI e páginas vêm do disco.",
+    )
+
     if st.button("Converter para Imagens 🚀", type="primary"):
+        zip_path = None
         with st.spinner(f"Convertendo PDF para {formato} ({dpi} DPI)..."):
             try:
-                # Ler bytes do arquivo
-                pdf_bytes = uploaded_file.read()
+                paginas = parse_page_range(selecao, total_doc)
 
-                # Chamar utilitário
-                output_data, total_pages, ext_type = convert_pdf_to_images(
-                    pdf_bytes, formato, dpi
-                )
+                progress_bar = st.progress(0)
+
+                def atualizar_progresso(feitas, total):
+                    progress_bar.progress(feitas / total, text=f"Página {feitas}/{total}")
+
+                # O ZIP é gravado em disco página a página, não em memória
+                with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as tmp_zip:
+                    zip_path = tmp_zip.name
+                    output_data, total_pages, ext_type = convert_pdf_to_images(
+                        pdf_bytes,
+                        formato,
+                        dpi,
+                        workers=workers,
+                        on_progress=atualizar_progresso,
+                        output=tmp_zip,
+                        pages=paginas,
+                        cache=get_result_cache() if use_cache else None,
+                    )
+                progress_bar.empty()
 
                 st.success(
                     f"🎉 Conversão concluída! {total_pages} páginas processadas."
@@ -46,12 +124,23 @@ if uploaded_file:
                     file_name = f"{os.path.splitext(uploaded_file.name)[0]}.{ext_type}"
                     label = f"📥 Baixar Imagem ({ext_type.upper()})"
 
-                st.download_button(
-                    label=label, data=output_data, file_name=file_name, mime=mime_type
-                )
+                if ext_type == "zip":
+                    # Servido direto do arquivo temporário
+                    with open(zip_path, "rb") as zip_file:
+                        st.download_button(
+                            label=label, data=zip_file, file_name=file_name, mime=mime_type
+                        )
+                else:
+                    st.download_button(
+                        label=label, data=output_data, file_name=file_name, mime=mime_type
+                    )
 
             except Exception as e:
                 st.error(f"❌ Erro durante a conversão: {e}")
+            finally:
+                # Garante limpeza
+                if zip_path and os.path.exists(zip_path):
+                    os.remove(zip_path)
 else:
     st.info("📄 Por favor, carregue um arquivo PDF para começar.")
 
@@ -1,10 +1,24 @@
 import streamlit as st
 
-import io
+import os
+import shutil
+import tempfile
 import zipfile
 
+from utils.file_system import format_size
 from utils.ui import render_footer
-from utils.image_tools import process_image_resize
+from utils.image_tools import (
+    OUTPUT_FORMATS,
+    RESPONSIVE_WIDTHS,
+    build_responsive_set,
+    output_file_name,
+    resize_images_parallel,
+)
+from utils.result_cache import get_result_cache
+
+PREVIEW_PAGE_SIZE = 24
+THUMBNAIL_SIZE = 320
+RESPONSIVE_MODE = "Conjunto Responsivo (srcset)"
 
 
 # --- HELPER FUNCTIONS ---
@@ -18,7 +32,7 @@ def render_config_section():
     with col_mode:
         resize_mode = st.radio(
             "Modo de Redimensionamento:",
-            ["Porcentagem (%)", "Largura Fixa (px)", "Altura Fixa (px)"],
+            ["Porcentagem (%)", "Largura Fixa (px)", "Altura Fixa (px)", RESPONSIVE_MODE],
             horizontal=True,
         )
 
@@ -27,6 +41,13 @@ def render_config_section():
             val = st.slider(
                 "Porcentagem do tamanho original", 1, 200, 50, 5, format="%d%%"
             )
+        elif resize_mode == RESPONSIVE_MODE:
+            val = st.multiselect(
+                "Larguras (pixels)",
+                [320, 480, 640, 768, 1024, 1280, 1600, 1920, 2560],
+                default=list(RESPONSIVE_WIDTHS),
+                help="Cada imagem é decodificada uma vez e reduzida em cascata.",
+            )
         elif "Largura" in resize_mode:
             val = st.number_input(
                 "Nova Largura (pixels)", min_value=50, value=800, step=50
@@ -35,46 +56,176 @@ def render_config_section():
             val = st.number_input(
                 "Nova Altura (pixels)", min_value=50, value=600, step=50
             )
-    return resize_mode, val
 
+    col_fmt, col_alvo = st.columns(2)
+    with col_fmt:
+        output_format = st.selectbox(
+            "Formato de saída:",
+            ["Original", *OUTPUT_FORMATS],
+            help="WEBP e AVIF costumam gerar arquivos bem menores que JPEG.",
+        )
+    with col_alvo:
+        alvo = st.radio(
+            "Qualidade:",
+            ["Fixa (90)", "Tamanho máximo (KB)", "Qualidade mínima (SSIM)"],
+            horizontal=True,
+        )
+        max_bytes, min_ssim = None, None
+        if "Tamanho" in alvo:
+            max_bytes = 1024 * st.number_input("Tamanho máximo por imagem (KB)", min_value=5, value=200, step=10)
+        elif "SSIM" in alvo:
+            min_ssim = st.slider(
+                "SSIM mínimo", 0.80, 0.99, 0.95, 0.01,
+                help="Similaridade com a imagem sem perdas (1.0 = idêntica).",
+            )
+    if (max_bytes or min_ssim) and output_format == "Original":
+        st.warning(
+            "Tamanho máximo e SSIM mínimo só valem para JPEG, WEBP e AVIF: "
+            "imagens PNG darão erro. Escolha um formato de saída."
+        )
+    encoding = {
+        "output_format": None if output_format == "Original" else output_format,
+        "max_bytes": max_bytes,
+        "min_ssim": min_ssim,
+    }
+
+    use_cache = st.checkbox(
+        "⚡ Reutilizar resultados em cache",
+        value=True,
+        help="Imagens já redimensionadas com os mesmos parâmetros vêm do disco.",
+    )
 
-def render_results_section(processed_images):
-    """Renderiza a seção de resultados e downloads."""
-    if not processed_images:
+    max_workers = os.cpu_count() or 1
+    workers = st.slider(
+        "⚙️ Processos em paralelo",
+        1,
+        max_workers,
+        min(4, max_workers),
+        help="Redimensiona várias imagens ao mesmo tempo.",
+    )
+    return resize_mode, val, use_cache, workers, encoding
+
+
+def render_results_section(resultados):
+    """Renderiza a seção de resultados e downloads (miniaturas paginadas)."""
+    items = resultados["items"]
+    if not items:
         return
 
-    st.success(f"✅ {len(processed_images)} imagens processadas com sucesso!")
-
-    # Opção de Download ZIP
-    if len(processed_images) > 1:
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w") as zip_file:
-            for p_img in processed_images:
-                zip_file.writestr(p_img["name"], p_img["data"])
-
-        st.download_button(
-            label="📦 Baixar Todas (ZIP)",
-            data=zip_buffer.getvalue(),
-            file_name="imagens_redimensionadas.zip",
-            mime="application/zip",
-            type="primary",
-        )
+    st.success(f"✅ {len(items)} imagens processadas com sucesso!")
+
+    # Opção de Download ZIP (já gravado em disco durante o processamento).
+    # O download_button lê o arquivo inteiro: só quando o download é pedido,
+    # não a cada troca de página da pré-visualização
+    if len(items) > 1 and st.button("📦 Preparar download (ZIP)", type="primary"):
+        with open(resultados["zip"], "rb") as zip_file:
+            st.download_button(
+                label="📦 Baixar Todas (ZIP)",
+                data=zip_file,
+                file_name="imagens_redimensionadas.zip",
+                mime="application/zip",
+                type="primary",
+                on_click="ignore",
+            )
 
     st.divider()
     st.subheader("👀 Pré-visualização")
 
-    # Grid de Imagens
+    # Grid de miniaturas, uma página por vez
+    total_pages = (len(items) + PREVIEW_PAGE_SIZE - 1) // PREVIEW_PAGE_SIZE
+    page = 1
+    if total_pages > 1:
+        page = st.number_input(
+            f"Página (de {total_pages})", min_value=1, max_value=total_pages, value=1
+        )
+    first = (page - 1) * PREVIEW_PAGE_SIZE
+
     cols = st.columns(3)
-    for idx, p_img in enumerate(processed_images):
+    for idx, p_img in enumerate(items[first : first + PREVIEW_PAGE_SIZE], start=first):
         with cols[idx % 3]:
-            st.image(p_img["data"], caption=f"{p_img['name']} ({p_img['dims']})")
-            st.download_button(
-                label="⬇️ Baixar",
-                data=p_img["data"],
-                file_name=p_img["name"],
-                mime=p_img["type"],
-                key=f"btn_{idx}",
+            st.image(
+                p_img["thumb"],
+                caption=f"{p_img['name']} ({p_img['dims']}, {format_size(p_img['size'])})",
             )
+            with open(p_img["path"], "rb") as f:
+                st.download_button(
+                    label="⬇️ Baixar",
+                    data=f,
+                    file_name=p_img["name"],
+                    mime=p_img["type"],
+                    key=f"btn_{idx}",
+                )
+
+
+def process_responsive_sets(uploaded_files, widths, encoding):
+    """
+    Gera um ZIP com o conjunto responsivo + manifesto para cada imagem.
+    Os ZIPs ficam em disco e a lista na sessão, para que qualquer rerun
+    (ex.: preparar o download de um conjunto) não apague os demais.
+    """
+    if not widths:
+        st.warning("Selecione ao menos uma largura.")
+        return
+
+    out_dir = tempfile.mkdtemp(prefix="responsivas_")
+    sets = []
+    progress_bar = st.progress(0)
+    for i, up_file in enumerate(uploaded_files):
+        stem = os.path.splitext(up_file.name)[0]
+        zip_path = os.path.join(out_dir, f"{i:05d}_{stem}_responsivo.zip")
+        try:
+            with open(zip_path, "wb") as zip_file:
+                _, manifest = build_responsive_set(up_file, widths, output=zip_file, **encoding)
+            sets.append({"name": up_file.name, "stem": stem, "zip": zip_path, "manifest": manifest})
+        except Exception as e:
+            st.error(f"Erro ao processar {up_file.name}: {e}")
+        progress_bar.progress((i + 1) / len(uploaded_files))
+    progress_bar.empty()
+
+    st.session_state["redim_conjuntos"] = {"dir": out_dir, "items": sets}
+
+
+def render_responsive_sets(conjuntos):
+    """Renderiza os conjuntos responsivos gerados, com o `srcset` e o ZIP de cada um."""
+    for i, item in enumerate(conjuntos["items"]):
+        manifest = item["manifest"]
+        with st.container(border=True):
+            st.markdown(f"**{item['name']}** — {len(manifest['versoes'])} versões")
+            st.code(
+                f'<img src="{manifest["src"]}" srcset="{manifest["srcset"]}" '
+                f'sizes="100vw" alt="">',
+                language="html",
+            )
+            # O ZIP só é lido quando o download deste conjunto é pedido
+            if st.button("📦 Preparar download (ZIP)", key=f"prep_resp_{i}"):
+                with open(item["zip"], "rb") as zip_file:
+                    st.download_button(
+                        label="📦 Baixar Conjunto (ZIP)",
+                        data=zip_file,
+                        file_name=f"{item['stem']}_responsivo.zip",
+                        mime="application/zip",
+                        key=f"resp_{i}",
+                        on_click="ignore",
+                    )
+
+
+def unique_name(name, used):
+    """Nome livre no ZIP: `foto.png` e `foto.jpg` viram `foto.webp` e `foto_2.webp`."""
+    stem, ext = os.path.splitext(name)
+    candidate, n = name, 1
+    while candidate in used:
+        n += 1
+        candidate = f"{stem}_{n}{ext}"
+    used.add(candidate)
+    return candidate
+
+
+def discard_results(*keys):
+    """Apaga do disco os arquivos do lote anterior (resultados e/ou conjuntos)."""
+    for key in keys or ("redim_resultados", "redim_conjuntos"):
+        anteriores = st.session_state.pop(key, None)
+        if anteriores:
+            shutil.rmtree(anteriores["dir"], ignore_errors=True)
 
 
 # --- MAIN UI ---
@@ -95,35 +246,81 @@ uploaded_files = st.file_uploader(
 
 if uploaded_files:
     # 1. Configuração
-    resize_mode, val = render_config_section()
+    resize_mode, val, use_cache, workers, encoding = render_config_section()
 
     # 2. Processamento
-    if st.button("Processar Imagens 🚀", type="primary"):
-        processed_images = []
+    # Resultados do outro modo não valem mais
+    discard_results("redim_resultados" if resize_mode == RESPONSIVE_MODE else "redim_conjuntos")
+
+    if resize_mode == RESPONSIVE_MODE:
+        if st.button("Gerar Conjuntos 🚀", type="primary"):
+            discard_results("redim_conjuntos")
+            process_responsive_sets(uploaded_files, val, encoding)
+        if "redim_conjuntos" in st.session_state:
+            render_responsive_sets(st.session_state["redim_conjuntos"])
+    elif st.button("Processar Imagens 🚀", type="primary"):
+        discard_results()
+        out_dir = tempfile.mkdtemp(prefix="redimensionadas_")
+        zip_path = os.path.join(out_dir, "imagens_redimensionadas.zip")
+        processed = {}
+        used_names = set()
         progress_bar = st.progress(0)
+        cache = get_result_cache() if use_cache else None
 
-        for i, up_file in enumerate(uploaded_files):
-            try:
-                # Processar imagem usando utilitário
-                byte_im, dims, fmt = process_image_resize(up_file, resize_mode, val)
+        # Pré-visualização ao vivo: cada miniatura aparece assim que fica pronta
+        live_preview = st.empty()
+        live_cols = live_preview.container().columns(3)
 
-                processed_images.append(
-                    {
-                        "name": f"{up_file.name}",
-                        "data": byte_im,
+        results = resize_images_parallel(
+            uploaded_files,
+            resize_mode,
+            val,
+            workers=workers,
+            cache=cache,
+            thumbnail_size=THUMBNAIL_SIZE,
+            **encoding,
+        )
+        # Imagens já comprimidas: ZIP_STORED e gravação direta em disco
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as zip_file:
+            for done, (i, result, error) in enumerate(results, start=1):
+                up_file = uploaded_files[i]
+                if error is not None:
+                    st.error(f"Erro ao processar {up_file.name}: {error}")
+                else:
+                    byte_im, dims, fmt, thumb = result
+                    name = unique_name(output_file_name(up_file.name, fmt), used_names)
+                    zip_file.writestr(name, byte_im)
+                    path = os.path.join(out_dir, f"{i:05d}_{name}")
+                    with open(path, "wb") as f:
+                        f.write(byte_im)
+                    processed[i] = {
+                        "name": name,
+                        "path": path,
+                        "thumb": thumb,
                         "type": f"image/{fmt.lower()}",
                         "dims": dims,
+                        "size": len(byte_im),
                     }
-                )
+                    if done <= PREVIEW_PAGE_SIZE:
+                        with live_cols[(done - 1) % 3]:
+                            st.image(thumb, caption=f"{name} ({dims})")
 
-            except Exception as e:
-                st.error(f"Erro ao processar {up_file.name}: {e}")
-
-            progress_bar.progress((i + 1) / len(uploaded_files))
+                progress_bar.progress(done / len(uploaded_files))
 
         progress_bar.empty()
+        live_preview.empty()
+
+        # Resultados (na ordem do upload) ficam na sessão para a paginação
+        st.session_state["redim_resultados"] = {
+            "dir": out_dir,
+            "zip": zip_path,
+            "items": [processed[i] for i in sorted(processed)],
+        }
 
-        # 3. Resultados
-        render_results_section(processed_images)
+    # 3. Resultados
+    if "redim_resultados" in st.session_state:
+        render_results_section(st.session_state["redim_resultados"])
+else:
+    discard_results()
 
 render_footer()
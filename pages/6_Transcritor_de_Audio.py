@@ -1,9 +1,11 @@
 import streamlit as st
 import os
+import shutil
 
 from dotenv import load_dotenv
 
-from utils.audio_tools import transcribe_audio_file, generate_summary
+from utils.audio_tools import transcribe_audio_files, generate_summary
+from utils.result_cache import get_text_cache
 from utils.ui import render_footer
 
 # Carregar env
@@ -27,26 +29,55 @@ uploaded_files = st.file_uploader(
 )
 
 if uploaded_files:
+    max_concurrency = st.slider(
+        "⚙️ Transcrições simultâneas",
+        1,
+        8,
+        4,
+        help="Quantos arquivos são enviados à API ao mesmo tempo.",
+    )
+
+    use_cache = st.checkbox(
+        "⚡ Reutilizar transcrições e resumos em cache",
+        value=True,
+        help="Áudios já transcritos (mesmo conteúdo) e resumos do mesmo texto vêm do disco, sem nova chamada à API.",
+    )
+    cache = get_text_cache() if use_cache else None
+
+    if shutil.which("ffmpeg"):
+        codec_label = st.radio(
+            "🗜️ Compactar áudio antes do envio",
+            ["Opus (16 kHz mono)", "MP3 (16 kHz mono)", "Não compactar"],
+            horizontal=True,
+            help="Reduz o upload em 10x ou mais e remove silêncios no início e no fim.",
+        )
+        speech_codec = {"Opus": "opus", "MP3": "mp3"}.get(codec_label.split()[0])
+    else:
+        speech_codec = None
+        st.caption("ℹ️ Instale o ffmpeg para compactar áudios e dividir gravações longas.")
+
     if st.button("Iniciar Processamento ⚡", type="primary"):
-        all_transcripts = []
+        transcripts = {}
 
-        # 1. Transcrição
+        # 1. Transcrição (concorrente, na ordem de conclusão)
         progress_bar = st.progress(0)
 
-        for i, uploaded_file in enumerate(uploaded_files):
-            with st.spinner(f"Transcrevendo {uploaded_file.name}..."):
-                try:
-                    # Chamar utilitário
-                    text = transcribe_audio_file(uploaded_file, api_key)
-                    all_transcripts.append((uploaded_file.name, text))
-
-                    with st.expander(f"📝 Texto: {uploaded_file.name}", expanded=False):
-                        st.text_area("Transcrição", text, height=150)
-
-                except Exception as e:
-                    st.error(f"Falha em {uploaded_file.name}: {e}")
-
-            progress_bar.progress((i + 1) / len(uploaded_files))
+        with st.spinner(f"Transcrevendo {len(uploaded_files)} arquivo(s)..."):
+            results = transcribe_audio_files(
+                uploaded_files, api_key, max_concurrency, speech_codec=speech_codec, cache=cache
+            )
+            for done, (i, text, error) in enumerate(results, start=1):
+                if error is not None:
+                    st.error(f"Falha em {uploaded_files[i].name}: {error}")
+                else:
+                    transcripts[i] = (uploaded_files[i].name, text)
+                progress_bar.progress(done / len(uploaded_files))
+
+        # Textos na ordem do upload
+        all_transcripts = [transcripts[i] for i in sorted(transcripts)]
+        for idx, (name, text) in enumerate(all_transcripts):
+            with st.expander(f"📝 Texto: {name}", expanded=False):
+                st.text_area("Transcrição", text, height=150, key=f"transcricao_{idx}")
 
         # 2. Resumo
         if all_transcripts:
@@ -58,7 +89,7 @@ if uploaded_files:
 
             with st.spinner("🧠 Gerando Resumo Inteligente..."):
                 try:
-                    summary = generate_summary(combined_text, api_key)
+                    summary = generate_summary(combined_text, api_key, cache=cache)
 
                     st.subheader("📊 Resumo Consolidado")
                     st.markdown(summary)
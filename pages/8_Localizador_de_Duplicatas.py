@@ -0,0 +1,89 @@
+import streamlit as st
+import os
+
+import pandas as pd
+
+from utils.duplicates import find_duplicates, get_hash_cache
+from utils.file_system import get_default_path, format_size
+from utils.ui import render_footer
+
+st.set_page_config(page_title="Localizador de Duplicatas", page_icon="🧬", layout="wide")
+st.title("🧬 Localizador de Arquivos Duplicados")
+st.markdown("Encontra arquivos com conteúdo idêntico em uma pasta e em todas as suas subpastas.")
+
+# Input
+default_path = get_default_path()
+caminho_input = st.text_input("Caminho da Pasta", value=default_path)
+
+if caminho_input:
+    caminho_input = caminho_input.strip().strip('"').strip("'")
+
+col1, col2 = st.columns(2)
+with col1:
+    tam_min_kb = st.number_input(
+        "Ignorar arquivos menores que (KB)", min_value=0, value=1, step=1
+    )
+with col2:
+    use_cache = st.checkbox(
+        "⚡ Usar cache de hashes",
+        value=True,
+        help="Reaproveita hashes de arquivos que não mudaram desde a última varredura.",
+    )
+
+ETAPAS = {"parcial": "Comparando início/fim", "completo": "Calculando hash completo"}
+
+if st.button("Procurar Duplicatas 🔍", type="primary"):
+    if not caminho_input:
+        st.warning("Por favor, insira um caminho.")
+    elif not os.path.isdir(caminho_input):
+        st.error(f"❌ '{caminho_input}' não é um diretório válido.")
+    else:
+        status = st.empty()
+        progress_bar = st.progress(0)
+
+        def atualizar_progresso(etapa, feitos, total):
+            if feitos % 100 and feitos != total:
+                return
+            status.info(f"⏳ {ETAPAS[etapa]}... {feitos}/{total}")
+            progress_bar.progress(feitos / total)
+
+        with st.spinner("Agrupando arquivos por tamanho..."):
+            duplicatas = find_duplicates(
+                caminho_input,
+                min_size=max(tam_min_kb * 1024, 1),
+                cache=get_hash_cache() if use_cache else None,
+                on_progress=atualizar_progresso,
+            )
+        status.empty()
+        progress_bar.empty()
+
+        if not duplicatas:
+            st.success("✅ Nenhum arquivo duplicado encontrado.")
+        else:
+            desperdicio = sum(size * (len(files) - 1) for _, size, files in duplicatas)
+            st.success(
+                f"🧬 {len(duplicatas)} grupo(s) de duplicatas. "
+                f"Espaço recuperável: {format_size(desperdicio)}"
+            )
+
+            linhas = [
+                {
+                    "Grupo": i + 1,
+                    "Arquivo": arquivo,
+                    "Tamanho": format_size(size),
+                    "Hash": digest[:16],
+                }
+                for i, (digest, size, files) in enumerate(duplicatas)
+                for arquivo in files
+            ]
+            df = pd.DataFrame(linhas)
+            st.dataframe(df, hide_index=True, use_container_width=True)
+
+            st.download_button(
+                label="⬇️ Baixar Relatório (.csv)",
+                data=df.to_csv(index=False),
+                file_name="duplicatas.csv",
+                mime="text/csv",
+            )
+
+render_footer()
@@ -0,0 +1,96 @@
+import streamlit as st
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from utils.pdf_search import get_search_index
+from utils.ui import render_footer
+
+st.set_page_config(page_title="Busca em PDFs", page_icon="🔎", layout="wide")
+st.title("🔎 Busca em PDFs")
+st.markdown(
+    "Indexe seus PDFs uma vez e encontre palavras-chave em todo o acervo, com a página exata de cada ocorrência."
+)
+
+indice = get_search_index()
+
+# --- INDEXAÇÃO ---
+uploaded_files = st.file_uploader(
+    "Adicionar PDFs ao índice",
+    type="pdf",
+    accept_multiple_files=True,
+)
+
+if uploaded_files:
+    max_workers = os.cpu_count() or 1
+    workers = st.slider(
+        "⚙️ Processos em paralelo",
+        1,
+        max_workers,
+        min(4, max_workers),
+        help="Extrai o texto das páginas em paralelo (útil para PDFs longos).",
+    )
+
+    if st.button("Indexar PDFs 📚", type="primary"):
+        progress_bar = st.progress(0)
+        novos, repetidos = 0, 0
+
+        for i, up_file in enumerate(uploaded_files):
+            try:
+                _, ja_indexado = indice.add_document(
+                    up_file.name, up_file.getvalue(), workers=workers
+                )
+                if ja_indexado:
+                    repetidos += 1
+                else:
+                    novos += 1
+            except Exception as e:
+                st.error(f"Erro ao indexar {up_file.name}: {e}")
+
+            progress_bar.progress((i + 1) / len(uploaded_files))
+
+        progress_bar.empty()
+        st.success(f"✅ {novos} PDF(s) indexados. {repetidos} já estavam no índice.")
+
+# --- BUSCA ---
+st.divider()
+st.subheader("🔍 Pesquisar")
+
+documentos = indice.list_documents()
+if not documentos:
+    st.info("📄 O índice está vazio. Carregue PDFs acima para começar.")
+else:
+    consulta = st.text_input(
+        "Palavras-chave",
+        placeholder="Ex: contrato rescisão (use * para prefixo: contrat*)",
+    )
+
+    if consulta:
+        resultados = indice.search(consulta)
+        if not resultados:
+            st.warning("Nenhuma ocorrência encontrada.")
+        else:
+            st.caption(f"{len(resultados)} página(s) encontrada(s)")
+            for r in resultados:
+                st.markdown(f"**📕 {r['documento']}** — página {r['pagina']}")
+                st.markdown(f"> {' '.join(r['trecho'].split())}")
+
+    with st.expander(f"📚 Documentos indexados ({len(documentos)})"):
+        df = pd.DataFrame(
+            [
+                {
+                    "Documento": nome,
+                    "Páginas": paginas,
+                    "Indexado em": datetime.fromtimestamp(ts).strftime("%d/%m/%Y %H:%M"),
+                }
+                for nome, paginas, ts in documentos
+            ]
+        )
+        st.dataframe(df, hide_index=True, use_container_width=True)
+
+        if st.button("🗑️ Limpar índice"):
+            indice.clear()
+            st.rerun()
+
+render_footer()
@@ -1,63 +1,463 @@
 import os
+import random
+import re
+import shutil
+import subprocess
 import tempfile
-from openai import OpenAI
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def transcribe_audio_file(uploaded_file, api_key):
+from openai import APIConnectionError, APIStatusError, OpenAI
+
+# Tentativas extras em 429/5xx/falha de conexão, com espera exponencial
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+# Limite de upload do Whisper (25 MB), com folga para o cabeçalho multipart
+MAX_UPLOAD_BYTES = 24 * 1024 * 1024
+# Trechos de no máximo 10 min: limita a latência da parte mais lenta
+CHUNK_SECONDS = 600
+CHUNK_OVERLAP = 2.0
+# silencedetect: abaixo de -35 dB por pelo menos 0,5 s conta como silêncio
+SILENCE_NOISE_DB = -35
+SILENCE_MIN_SECONDS = 0.5
+
+# Formatos compactos para fala: 16 kHz mono (o Whisper reamostra para 16 kHz)
+SPEECH_CODECS = {
+    "opus": (".ogg", ["-c:a", "libopus", "-b:a", "24k", "-application", "voip"]),
+    "mp3": (".mp3", ["-c:a", "libmp3lame", "-b:a", "32k"]),
+}
+SPEECH_SAMPLE_RATE = 16000
+# Silêncio final só é cortado se passar disso (s); folga mantida após a fala
+TRIM_MIN_SECONDS = 1.0
+TRIM_PADDING = 0.3
+
+WHISPER_MODEL = "whisper-1"
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_PROMPT = """
+    Analise o seguinte texto transcrito e crie um resumo estruturado:
+    1. Principais Tópicos
+    2. Ações/Tarefas (se houver)
+    3. Ferramentas ou Referências Citadas
+    4. Conclusão Geral
+
+    Texto:
+    {text}
+    """
+# Limite de segurança de tokens (aprox)
+SUMMARY_MAX_CHARS = 50000
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_openai_client(api_key, base_url=None):
+    """
+    Retorna o cliente OpenAI compartilhado para (api_key, base_url).
+    Um único cliente mantém um único pool de conexões HTTP, reaproveitado
+    por todas as chamadas (inclusive entre threads). `base_url` permite
+    apontar para um servidor local de testes.
+    As novas tentativas ficam a cargo de `_call_with_retry`.
+    """
+    key = (api_key, base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+            _clients[key] = client
+        return client
+
+
+def _is_retryable(error):
+    if isinstance(error, APIConnectionError):
+        return True
+    return isinstance(error, APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+
+def _retry_delay(error, attempt):
+    """Espera antes da próxima tentativa: Retry-After, se houver, senão exponencial com jitter."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        if retry_after is not None:
+            return min(float(retry_after), BACKOFF_MAX)
+    except ValueError:
+        pass
+    return min(BACKOFF_BASE * 2 ** attempt, BACKOFF_MAX) * random.uniform(0.5, 1.0)
+
+
+def _call_with_retry(fn, max_retries=MAX_RETRIES):
+    """Executa `fn`, repetindo em erros transitórios (429, 5xx, conexão)."""
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries or not _is_retryable(e):
+                raise
+            time.sleep(_retry_delay(e, attempt))
+            attempt += 1
+
+
+def _transcribe_bytes(client, name, data, limiter=None):
+    """Uma requisição de transcrição; `limiter` (semáforo) limita as simultâneas."""
+    def request():
+        return client.audio.transcriptions.create(model=WHISPER_MODEL, file=(name, data))
+
+    if limiter is None:
+        return _call_with_retry(request).text.strip()
+    with limiter:
+        return _call_with_retry(request).text.strip()
+
+
+def _transcript_cache_key(cache, uploaded_file):
+    return cache.make_key("transcription", [uploaded_file], model=WHISPER_MODEL)
+
+
+def transcribe_audio_file(
+    uploaded_file, api_key, base_url=None, max_concurrency=4, limiter=None, speech_codec="opus", cache=None
+):
     """
     Transcreve áudio usando OpenAI Whisper.
-    Salva arquivo temporário de forma segura (Windows-compatible).
+    O arquivo é enviado direto da memória, pelo cliente compartilhado.
+    Com ffmpeg disponível, o áudio é compactado para fala (`speech_codec`) e
+    áudios longos são divididos em trechos nos silêncios e transcritos em
+    paralelo; veja `transcribe_long_audio`.
+    Com `cache` (um `ResultCache`), o mesmo áudio (hash do conteúdo) com o
+    mesmo modelo não é transcrito de novo.
     """
     if not api_key:
         raise ValueError("Chave da API da OpenAI não fornecida.")
-        
-    client = OpenAI(api_key=api_key)
-    
-    # Cria arquivo temporário com extensão preservada
-    suffix = os.path.splitext(uploaded_file.name)[1]
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(uploaded_file.read())
-        tmp_path = tmp.name
-        
+
+    if cache is not None:
+        key = _transcript_cache_key(cache, uploaded_file)
+        hit = cache.get_bytes(key)
+        if hit is not None:
+            return hit[0].decode("utf-8")
+        text = transcribe_audio_file(
+            uploaded_file, api_key, base_url, max_concurrency, limiter, speech_codec
+        )
+        cache.put(key, text.encode("utf-8"), {"nome": uploaded_file.name, "modelo": WHISPER_MODEL})
+        return text
+
+    client = get_openai_client(api_key, base_url)
+
+    uploaded_file.seek(0)
+    data = uploaded_file.read()
+
     try:
-        with open(tmp_path, "rb") as audio_file:
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file
-            )
-        return transcript.text.strip()
-        
+        if shutil.which("ffmpeg"):
+            try:
+                return transcribe_long_audio(
+                    client,
+                    uploaded_file.name,
+                    data,
+                    max_concurrency=max_concurrency,
+                    limiter=limiter,
+                    speech_codec=speech_codec,
+                )
+            except FFmpegError:
+                # Pré-processamento falhou: arquivos pequenos seguem sem ele
+                if len(data) > MAX_UPLOAD_BYTES:
+                    raise
+        if len(data) > MAX_UPLOAD_BYTES:
+            raise RuntimeError("arquivo acima de 25 MB; instale o ffmpeg para dividi-lo em trechos")
+        return _transcribe_bytes(client, uploaded_file.name, data, limiter)
+
     except Exception as e:
         raise Exception(f"Erro na transcrição: {str(e)}")
-        
-    finally:
-        # Garante limpeza
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
 
-def generate_summary(text, api_key):
-    """Gera resumo consolidado com GPT-4o."""
+
+def transcribe_audio_files(
+    uploaded_files, api_key, max_concurrency=4, base_url=None, speech_codec="opus", cache=None
+):
+    """
+    Transcreve vários áudios ao mesmo tempo, com no máximo `max_concurrency`
+    requisições em andamento, todas pelo mesmo cliente (o limite vale também
+    para os trechos de áudios longos).
+    Gera (indice, texto, erro) na ordem de conclusão; uma falha num arquivo
+    não interrompe os demais.
+    Com `cache`, áudios já transcritos saem na hora, sem ir para o pool.
+    """
     if not api_key:
         raise ValueError("Chave da API da OpenAI não fornecida.")
-        
-    client = OpenAI(api_key=api_key)
-    
-    prompt = f"""
-    Analise o seguinte texto transcrito e crie um resumo estruturado:
-    1. Principais Tópicos
-    2. Ações/Tarefas (se houver)
-    3. Ferramentas ou Referências Citadas
-    4. Conclusão Geral
-    
-    Texto:
-    {text[:50000]}  # Limite de segurança de tokens (aprox)
+
+    pending = []
+    for i, uploaded_file in enumerate(uploaded_files):
+        if cache is not None:
+            try:
+                hit = cache.get_bytes(_transcript_cache_key(cache, uploaded_file))
+            except Exception:
+                hit = None
+            if hit is not None:
+                yield i, hit[0].decode("utf-8"), None
+                continue
+        pending.append(i)
+
+    if not pending:
+        return
+
+    limiter = threading.BoundedSemaphore(max_concurrency)
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        futures = {
+            executor.submit(
+                transcribe_audio_file,
+                uploaded_files[i],
+                api_key,
+                base_url,
+                max_concurrency,
+                limiter,
+                speech_codec,
+                cache,
+            ): i
+            for i in pending
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                yield i, future.result(), None
+            except Exception as e:
+                yield i, None, e
+
+
+# --- ÁUDIOS LONGOS (ffmpeg) ---
+class FFmpegError(RuntimeError):
+    """Falha ao executar o ffmpeg/ffprobe (binário ausente, arquivo ilegível etc.)."""
+
+
+def _run_ffmpeg(args, check=True):
+    """Executa ffmpeg/ffprobe; devolve (stdout, stderr) — o ffmpeg escreve os logs no stderr."""
+    try:
+        result = subprocess.run(args, capture_output=True, text=True, errors="replace")
+    except OSError as e:
+        raise FFmpegError(f"{args[0]} indisponível: {e}")
+    if check and result.returncode != 0:
+        raise FFmpegError(f"{args[0]} falhou: {result.stderr.strip()[-500:]}")
+    return result.stdout, result.stderr
+
+
+def probe_duration(path):
+    """
+    Duração do áudio em segundos: pelo ffprobe ou, se ele não estiver
+    instalado, pela linha "Duration:" que o ffmpeg imprime ao abrir o arquivo.
+    """
+    if shutil.which("ffprobe"):
+        stdout, _ = _run_ffmpeg(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path]
+        )
+        try:
+            return float(stdout.strip())
+        except ValueError:
+            raise FFmpegError(f"ffprobe não informou a duração: {stdout.strip()!r}")
+
+    # Sem saída definida o ffmpeg termina com erro, mas já imprimiu o cabeçalho
+    _, stderr = _run_ffmpeg(["ffmpeg", "-hide_banner", "-i", path], check=False)
+    match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", stderr)
+    if not match:
+        raise FFmpegError(f"ffmpeg não informou a duração: {stderr.strip()[-500:]}")
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def detect_silences(path, noise_db=SILENCE_NOISE_DB, min_silence=SILENCE_MIN_SECONDS):
+    """Intervalos (inicio, fim) de silêncio, em segundos, via filtro silencedetect."""
+    _, stderr = _run_ffmpeg(
+        [
+            "ffmpeg", "-hide_banner", "-nostats", "-i", path,
+            "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}",
+            "-f", "null", "-",
+        ]
+    )
+    starts = [float(x) for x in re.findall(r"silence_start: (-?[\d.]+)", stderr)]
+    ends = [float(x) for x in re.findall(r"silence_end: (-?[\d.]+)", stderr)]
+    return list(zip(starts, ends))
+
+
+def plan_chunks(duration, silences, chunk_seconds=CHUNK_SECONDS, overlap=CHUNK_OVERLAP):
+    """
+    Define os trechos (inicio, fim) em segundos. Cada corte cai no meio do
+    último silêncio da segunda metade da janela de `chunk_seconds`; sem
+    silêncio, corta no limite. Cada trecho começa `overlap` segundos antes
+    do corte anterior, para não perder palavras na emenda.
     """
-    
+    cuts = sorted((start + end) / 2 for start, end in silences)
+    chunks = []
+    start = 0.0
+    while duration - start > chunk_seconds:
+        limit = start + chunk_seconds
+        candidates = [c for c in cuts if start + chunk_seconds / 2 <= c <= limit]
+        cut = candidates[-1] if candidates else limit
+        chunks.append((max(0.0, start - overlap), cut))
+        start = cut
+    chunks.append((max(0.0, start - overlap), duration))
+    return chunks
+
+
+def _extract_chunk(path, start, end, out_path):
+    """Recorta [start, end] sem recodificar (cópia do fluxo de áudio)."""
+    _run_ffmpeg(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", path,
+            "-vn", "-c:a", "copy", out_path,
+        ]
+    )
+    return out_path
+
+
+def _normalize_word(word):
+    return re.sub(r"[^\w]", "", word.lower())
+
+
+def merge_overlapping_texts(texts, max_words=30, min_match=2):
+    """
+    Junta as transcrições dos trechos em ordem, removendo do início de cada
+    uma as palavras repetidas do fim da anterior (a região de sobreposição).
+    A comparação ignora maiúsculas e pontuação.
+    """
+    merged = []
+    for text in texts:
+        words = text.split()
+        if merged and words:
+            tail = [_normalize_word(w) for w in merged[-max_words:]]
+            head = [_normalize_word(w) for w in words[:max_words]]
+            for k in range(min(len(tail), len(head)), min_match - 1, -1):
+                if tail[-k:] == head[:k]:
+                    words = words[k:]
+                    break
+        merged.extend(words)
+    return " ".join(merged)
+
+
+def transcode_for_speech(path, out_path, codec="opus", noise_db=SILENCE_NOISE_DB):
+    """
+    Converte o áudio para 16 kHz mono num codec compacto de fala (Opus ou
+    MP3 de baixa taxa), já sem o silêncio inicial. Um WAV 44,1 kHz estéreo
+    encolhe dezenas de vezes.
+    """
+    _, args = SPEECH_CODECS[codec]
+    _run_ffmpeg(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", path,
+            "-vn", "-ac", "1", "-ar", str(SPEECH_SAMPLE_RATE),
+            "-af", f"silenceremove=start_periods=1:start_threshold={noise_db}dB:start_silence={TRIM_PADDING}",
+            *args, out_path,
+        ]
+    )
+    return out_path
+
+
+def _speech_end(duration, silences):
+    """Fim útil do áudio: antes do silêncio final, se ele for longo o bastante."""
+    if silences:
+        start, end = silences[-1]
+        if end >= duration - 0.05 and duration - start >= TRIM_MIN_SECONDS:
+            return min(duration, start + TRIM_PADDING)
+    return duration
+
+
+def transcribe_long_audio(
+    client,
+    name,
+    data,
+    max_concurrency=4,
+    limiter=None,
+    chunk_seconds=CHUNK_SECONDS,
+    overlap=CHUNK_OVERLAP,
+    max_upload_bytes=MAX_UPLOAD_BYTES,
+    speech_codec="opus",
+):
+    """
+    Transcreve um áudio dividindo-o em trechos nos silêncios (ffmpeg).
+    Com `speech_codec` ("opus" ou "mp3"; None mantém o original), o áudio é
+    antes convertido por `transcode_for_speech` e os silêncios do início e
+    do fim são descartados: menos bytes enviados e menos trechos.
+    O tamanho do trecho respeita `chunk_seconds` e o limite de upload (pela
+    taxa média de bytes do arquivo). Os trechos são transcritos em paralelo
+    e os textos emendados sem a repetição da sobreposição.
+    Áudios que cabem num único trecho vão numa só requisição.
+    """
+    stem, suffix = os.path.splitext(name)
+    work_dir = tempfile.mkdtemp(prefix="transcricao_")
+    try:
+        path = os.path.join(work_dir, f"original{suffix}")
+        with open(path, "wb") as f:
+            f.write(data)
+
+        if speech_codec:
+            suffix = SPEECH_CODECS[speech_codec][0]
+            path = transcode_for_speech(path, os.path.join(work_dir, f"fala{suffix}"), speech_codec)
+            name = f"{stem}{suffix}"
+            with open(path, "rb") as f:
+                data = f.read()
+
+        duration = probe_duration(path)
+        if duration > 0:
+            bytes_per_second = len(data) / duration
+            chunk_seconds = min(chunk_seconds, 0.95 * max_upload_bytes / bytes_per_second)
+
+        silences = detect_silences(path) if speech_codec or duration > chunk_seconds else []
+        end = _speech_end(duration, silences)
+
+        if end <= chunk_seconds:
+            if end < duration:
+                trimmed = _extract_chunk(path, 0.0, end, os.path.join(work_dir, f"aparado{suffix}"))
+                with open(trimmed, "rb") as f:
+                    data = f.read()
+            return _transcribe_bytes(client, name, data, limiter)
+
+        chunks = plan_chunks(end, silences, chunk_seconds, overlap)
+
+        def transcribe_chunk(i):
+            start, end = chunks[i]
+            chunk_path = _extract_chunk(path, start, end, os.path.join(work_dir, f"trecho_{i:04d}{suffix}"))
+            with open(chunk_path, "rb") as f:
+                chunk_data = f.read()
+            os.remove(chunk_path)
+            return _transcribe_bytes(client, os.path.basename(chunk_path), chunk_data, limiter)
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            texts = list(executor.map(transcribe_chunk, range(len(chunks))))
+        return merge_overlapping_texts(texts)
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def generate_summary(text, api_key, base_url=None, cache=None):
+    """
+    Gera resumo consolidado com GPT-4o.
+    Com `cache`, o mesmo texto (hash) com o mesmo prompt e modelo devolve o
+    resumo já gerado.
+    """
+    if not api_key:
+        raise ValueError("Chave da API da OpenAI não fornecida.")
+
+    prompt = SUMMARY_PROMPT.format(text=text[:SUMMARY_MAX_CHARS])
+
+    key = None
+    if cache is not None:
+        key = cache.make_key("summary", [prompt.encode("utf-8")], model=SUMMARY_MODEL)
+        hit = cache.get_bytes(key)
+        if hit is not None:
+            return hit[0].decode("utf-8")
+
+    client = get_openai_client(api_key, base_url)
+
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3
+        response = _call_with_retry(
+            lambda: client.chat.completions.create(
+                model=SUMMARY_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.3
+            )
         )
-        return response.choices[0].message.content.strip()
+        summary = response.choices[0].message.content.strip()
     except Exception as e:
         raise Exception(f"Erro no resumo: {str(e)}")
+
+    if key is not None:
+        cache.put(key, summary.encode("utf-8"), {"modelo": SUMMARY_MODEL})
+    return summary
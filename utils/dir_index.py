@@ -0,0 +1,113 @@
+import json
+import os
+import time
+
+from utils.file_system import scan_dir
+from utils.sqlite_store import CACHE_ROOT, SqliteStore, shared_instance
+
+DEFAULT_DB_PATH = os.path.join(CACHE_ROOT, "dir_index.sqlite3")
+
+
+class DirIndex(SqliteStore):
+    """
+    Índice persistente (SQLite) das listagens de diretórios.
+    Cada listagem é guardada por caminho junto com o mtime/inode da pasta; na
+    consulta basta um `os.stat` para saber se ela ainda vale. Só as pastas que
+    mudaram são relidas do disco. Mantém no máximo `max_entries` listagens,
+    descartando as menos usadas recentemente (LRU).
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_entries=200_000, commit_every=500):
+        super().__init__(db_path)
+        self.max_entries = max_entries
+        self.commit_every = commit_every
+        self._pending = 0
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS listings (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                device INTEGER NOT NULL,
+                entries TEXT NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_listings_access ON listings(last_access)")
+        self._conn.commit()
+
+    def list_dir(self, path):
+        """
+        Mesmo contrato de `scan_dir`: lista ordenada de
+        (nome, caminho_completo, is_dir, is_file).
+        """
+        key = os.path.abspath(path)
+        # O stat vem antes da leitura: se a pasta mudar durante o scan, o
+        # mtime gravado fica desatualizado e a próxima consulta relê a pasta.
+        st = os.stat(path)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime_ns, inode, device, entries FROM listings WHERE path = ?", (key,)
+            ).fetchone()
+
+            if row and row[:3] == (st.st_mtime_ns, st.st_ino, st.st_dev):
+                self._conn.execute("UPDATE listings SET last_access = ? WHERE path = ?", (now, key))
+                self._mark_dirty()
+                return [
+                    (name, os.path.join(path, name), is_dir, is_file)
+                    for name, is_dir, is_file in json.loads(row[3])
+                ]
+
+        entries = scan_dir(path)
+        payload = json.dumps([(name, is_dir, is_file) for name, _, is_dir, is_file in entries])
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO listings VALUES (?, ?, ?, ?, ?, ?)",
+                (key, st.st_mtime_ns, st.st_ino, st.st_dev, payload, now),
+            )
+            self._mark_dirty()
+        return entries
+
+    def _mark_dirty(self):
+        # Chamado com o lock adquirido; agrupa escritas em poucas transações
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self._commit_locked()
+
+    def _commit_locked(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM listings WHERE path IN "
+                "(SELECT path FROM listings ORDER BY last_access LIMIT ?)",
+                (excess,),
+            )
+        self._conn.commit()
+        self._pending = 0
+
+    def commit(self):
+        """Grava as alterações pendentes e aplica o limite de tamanho."""
+        with self._lock:
+            self._commit_locked()
+
+    def clear(self):
+        """Remove todas as listagens do índice."""
+        with self._lock:
+            self._conn.execute("DELETE FROM listings")
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self):
+        self.commit()
+        self._conn.close()
+
+
+@shared_instance
+def get_dir_index():
+    """Retorna a instância compartilhada do índice no caminho padrão."""
+    return DirIndex()
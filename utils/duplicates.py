@@ -0,0 +1,194 @@
+import hashlib
+import mmap
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils.file_system import iter_files
+from utils.sqlite_store import CACHE_ROOT, SqliteStore, shared_instance
+
+DEFAULT_DB_PATH = os.path.join(CACHE_ROOT, "file_hashes.sqlite3")
+
+# Trecho lido do início e do fim de cada arquivo na etapa de hash parcial
+PARTIAL_CHUNK = 4 * 1024
+# Leituras em blocos grandes quando o mmap não está disponível
+READ_BUFFER = 1024 * 1024
+
+
+def _partial_hash(path, size):
+    """Hash do primeiro e do último bloco do arquivo (mais o tamanho)."""
+    h = hashlib.blake2b(str(size).encode())
+    with open(path, "rb") as f:
+        h.update(f.read(PARTIAL_CHUNK))
+        if size > PARTIAL_CHUNK:
+            f.seek(max(size - PARTIAL_CHUNK, PARTIAL_CHUNK))
+            h.update(f.read(PARTIAL_CHUNK))
+    return h.hexdigest()
+
+
+def _full_hash(path):
+    """
+    Hash completo do arquivo. Executado nos processos do pool.
+    Retorna (caminho, hash) ou (caminho, None) se não for possível ler.
+    """
+    h = hashlib.blake2b()
+    try:
+        with open(path, "rb") as f:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    h.update(mm)
+            except (ValueError, OSError):
+                # Arquivo vazio ou sistema sem suporte a mmap: leitura em blocos
+                f.seek(0)
+                for block in iter(lambda: f.read(READ_BUFFER), b""):
+                    h.update(block)
+    except OSError:
+        return path, None
+    return path, h.hexdigest()
+
+
+class HashCache(SqliteStore):
+    """
+    Cache persistente (SQLite) de hashes por (caminho, tamanho, mtime).
+    Se o arquivo não mudou, os hashes parcial e completo são reaproveitados e
+    uma nova varredura só lê os arquivos novos ou modificados.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_entries=1_000_000):
+        super().__init__(db_path)
+        self.max_entries = max_entries
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                partial TEXT,
+                full TEXT
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, path, size, mtime):
+        """Retorna (parcial, completo) válidos para o arquivo, ou (None, None)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime, partial, full FROM hashes WHERE path = ?", (path,)
+            ).fetchone()
+        if row and row[0] == size and row[1] == mtime:
+            return row[2], row[3]
+        return None, None
+
+    def put(self, path, size, mtime, partial, full=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO hashes (path, size, mtime, partial, full) VALUES (?, ?, ?, ?, ?)",
+                (path, size, mtime, partial, full),
+            )
+
+    def commit(self):
+        """Grava as alterações e aplica o limite de tamanho (remove as mais antigas)."""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM hashes WHERE rowid IN (SELECT rowid FROM hashes ORDER BY rowid LIMIT ?)",
+                    (excess,),
+                )
+            self._conn.commit()
+
+    def close(self):
+        self.commit()
+        self._conn.close()
+
+
+def find_duplicates(path, min_size=1, workers=None, cache=None, on_progress=None):
+    """
+    Encontra arquivos duplicados numa árvore de pastas, em etapas:
+    1. agrupa por tamanho (só metadados, via `iter_files`). Links simbólicos
+       são ignorados e cada conjunto de hardlinks conta uma vez só (o
+       primeiro caminho encontrado): apagar um deles não libera espaço;
+    2. compara um hash do início e do fim dos arquivos de mesmo tamanho;
+    3. calcula o hash completo (mmap, em um pool de processos) só dos
+       candidatos restantes.
+    `cache` (um `HashCache`) evita reler arquivos que não mudaram.
+    `on_progress(etapa, feitos, total)` informa o andamento.
+    Retorna uma lista de (hash, tamanho, [caminhos_relativos]) ordenada pelo
+    espaço desperdiçado, do maior para o menor.
+    """
+    # 1. Agrupar por tamanho
+    by_size = defaultdict(list)
+    seen_inodes = set()
+    for rel_path, size, mtime, inode in iter_files(path, min_size=min_size, skip_symlinks=True, with_inode=True):
+        if inode is not None:
+            if inode in seen_inodes:
+                continue
+            seen_inodes.add(inode)
+        by_size[size].append((rel_path, mtime))
+    del seen_inodes
+    candidates = [(size, files) for size, files in by_size.items() if len(files) > 1]
+    del by_size
+
+    # 2. Hash parcial (início + fim)
+    by_partial = defaultdict(list)
+    total = sum(len(files) for _, files in candidates)
+    done = 0
+    for size, files in candidates:
+        for rel_path, mtime in files:
+            full_path = os.path.join(path, rel_path)
+            partial, full = cache.get(full_path, size, mtime) if cache else (None, None)
+            if partial is None:
+                try:
+                    partial = _partial_hash(full_path, size)
+                except OSError:
+                    continue
+                if cache:
+                    cache.put(full_path, size, mtime, partial)
+            by_partial[(size, partial)].append((rel_path, mtime, full))
+            done += 1
+            if on_progress:
+                on_progress("parcial", done, total)
+
+    # 3. Hash completo dos candidatos restantes
+    groups = defaultdict(list)
+    to_hash = {}
+    for (size, partial), files in by_partial.items():
+        if len(files) < 2:
+            continue
+        for rel_path, mtime, full in files:
+            if full is not None:
+                groups[(size, full)].append(rel_path)
+            else:
+                to_hash[os.path.join(path, rel_path)] = (rel_path, size, mtime, partial)
+    del by_partial
+
+    if to_hash:
+        total = len(to_hash)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_full_hash, full_path) for full_path in to_hash]
+            for done, future in enumerate(as_completed(futures), start=1):
+                full_path, digest = future.result()
+                if digest is not None:
+                    rel_path, size, mtime, partial = to_hash[full_path]
+                    groups[(size, digest)].append(rel_path)
+                    if cache:
+                        cache.put(full_path, size, mtime, partial, digest)
+                if on_progress:
+                    on_progress("completo", done, total)
+
+    if cache:
+        cache.commit()
+
+    duplicates = [
+        (digest, size, sorted(files)) for (size, digest), files in groups.items() if len(files) > 1
+    ]
+    duplicates.sort(key=lambda d: (-d[1] * (len(d[2]) - 1), d[2][0]))
+    return duplicates
+
+
+@shared_instance
+def get_hash_cache():
+    """Retorna a instância compartilhada do cache de hashes no caminho padrão."""
+    return HashCache()
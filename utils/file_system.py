@@ -1,4 +1,10 @@
+import csv
+import fnmatch
+import json
 import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 def get_file_icon(name, is_dir):
     if is_dir:
@@ -45,70 +51,323 @@ def get_file_icon(name, is_dir):
     
     return icons.get(ext, "📄 ")
 
-def get_tree_structure(path, prefix="", is_last=True, output_list=None, current_depth=0, max_depth=5, max_items=50, use_icons=False):
+def _format_tree_name(name, is_dir, use_icons):
+    """Monta o nome exibido de um nó (ícone ou barra final para pastas)."""
+    if use_icons:
+        return f"{get_file_icon(name, is_dir)}{name}"
+    return name + "/" if is_dir else name
+
+
+def _entry_flags(entry):
+    """Retorna (is_dir, is_file) de um DirEntry, tratando erros como False."""
+    try:
+        if entry.is_dir():
+            return True, False
+        return False, entry.is_file()
+    except OSError:
+        return False, False
+
+
+def scan_dir(path):
+    """
+    Lista o conteúdo de uma pasta com `os.scandir`, ordenado por nome.
+    Retorna uma lista de (nome, caminho_completo, is_dir, is_file).
+    """
+    with os.scandir(path) as it:
+        entries = [(entry.name, entry.path) + _entry_flags(entry) for entry in it]
+    entries.sort(key=lambda item: item[0])
+    return entries
+
+
+def iter_tree_structure(path, prefix="", is_last=True, current_depth=0, max_depth=5, max_items=50, use_icons=False, cache=None, workers=1, disk_usage=False, sort_by_size=False):
+    """
+    Gera as linhas da árvore de um diretório sob demanda (generator).
+    Usa `os.scandir` com uma pilha explícita: não há recursão em Python e o
+    tipo de cada item vem do próprio `DirEntry`, sem stats extras.
+    Se `cache` (um `DirIndex`) for informado, as listagens vêm do índice em disco.
+    Com `workers > 1`, as subpastas irmãs são listadas em paralelo por um pool
+    de threads (útil em montagens de rede); a saída continua idêntica.
+    Com `disk_usage=True`, cada pasta mostra tamanho total e número de
+    arquivos (estilo `du`), calculados numa única passada; `sort_by_size`
+    ordena os itens do maior para o menor. Nesse modo `cache` e `workers`
+    são ignorados, pois a passada precisa do stat de todos os arquivos.
+    """
+    if current_depth == 0 and not os.path.exists(path):
+        yield "❌ Caminho não encontrado."
+        return
+
+    if disk_usage:
+        usage = DiskUsage(path, max_depth - current_depth, sort_by_size)
+        yield from _walk_tree(path, prefix, is_last, current_depth, max_depth, max_items, use_icons, usage.list_dir, annotate=usage.describe)
+        return
+
+    list_dir = cache.list_dir if cache is not None else scan_dir
+
+    if workers and workers > 1:
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            yield from _walk_tree(path, prefix, is_last, current_depth, max_depth, max_items, use_icons, list_dir, executor, workers * 64)
+        finally:
+            # Também roda se o generator for fechado antes do fim
+            executor.shutdown(wait=False, cancel_futures=True)
+    else:
+        yield from _walk_tree(path, prefix, is_last, current_depth, max_depth, max_items, use_icons, list_dir)
+
+
+def _walk_tree(path, prefix, is_last, current_depth, max_depth, max_items, use_icons, list_dir, executor=None, max_pending=0, annotate=None):
+    """Laço principal de `iter_tree_structure` (com pré-listagem opcional)."""
+    # Listagens já disparadas no pool, por caminho. A ordem de consumo segue a
+    # pilha, então a saída é determinística mesmo com threads.
+    pending = {}
+
+    def listing(dir_path):
+        future = pending.pop(dir_path, None)
+        if future is not None:
+            return future.result()
+        return list_dir(dir_path)
+
+    # Itens da pilha: ("node", nome, caminho, is_dir, prefixo, is_last, profundidade)
+    # ou ("line", texto) para mensagens que devem sair depois dos filhos.
+    # O tipo da raiz é desconhecido (None) e é resolvido com os.path.isdir.
+    stack = [("node", os.path.basename(path), path, None, prefix, is_last, current_depth)]
+
+    while stack:
+        item = stack.pop()
+        if item[0] == "line":
+            yield item[1]
+            continue
+
+        _, name, full_path, is_dir, node_prefix, node_is_last, depth = item
+        if is_dir is None:
+            is_dir = os.path.isdir(full_path)
+
+        connector = "└── " if node_is_last else "├── "
+        line = node_prefix + connector + _format_tree_name(name, is_dir, use_icons)
+        if annotate is not None:
+            line += annotate(full_path, is_dir)
+        yield line
+
+        if not is_dir or depth >= max_depth:
+            continue
+
+        new_prefix = node_prefix + ("    " if node_is_last else "│   ")
+        try:
+            entries = listing(full_path)
+        except PermissionError:
+            yield new_prefix + "⛔ [Acesso Negado]"
+            continue
+        except Exception as e:
+            yield f"    ⚠️ [Erro: {e}]"
+            continue
+
+        original_count = len(entries)
+        has_hidden = original_count > max_items
+        if has_hidden:
+            entries = entries[:max_items]
+            stack.append(("line", new_prefix + f"... e mais {original_count - max_items} itens ocultos"))
+
+        if executor is not None and depth + 1 < max_depth:
+            for _, child_path, child_is_dir, _ in entries:
+                if len(pending) >= max_pending:
+                    break
+                if child_is_dir and child_path not in pending:
+                    pending[child_path] = executor.submit(list_dir, child_path)
+
+        # Empilha em ordem reversa para que o primeiro filho saia primeiro
+        last_index = len(entries) - 1
+        for i in range(last_index, -1, -1):
+            child_name, child_path, child_is_dir, _ = entries[i]
+            # Se há itens ocultos, o último visível NÃO é o último semanticamente
+            child_is_last = (i == last_index) and not has_hidden
+            stack.append(("node", child_name, child_path, child_is_dir, new_prefix, child_is_last, depth + 1))
+
+
+def format_size(num_bytes):
+    """Formata bytes em unidade legível (ex: 1.5 MB)."""
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class DiskUsage:
+    """
+    Agregação estilo `du` de uma árvore, feita numa única passada de scandir.
+    Soma tamanho (st_size) e quantidade de arquivos por pasta, contando cada
+    hardlink uma única vez por (st_dev, st_ino): o crédito fica com o primeiro
+    caminho na ordem de visita (nomes ordenados; numa pasta, os arquivos antes
+    das subpastas), e os demais links não somam nem tamanho nem contagem de
+    arquivos. Links simbólicos para pastas não são seguidos. Guarda as listagens apenas até `max_depth` níveis, que é
+    o que a árvore exibe; pastas mais profundas só contribuem com os totais.
+    """
+
+    def __init__(self, path, max_depth, sort_by_size=False):
+        self.sort_by_size = sort_by_size
+        self.totals = {}    # pasta exibida -> [tamanho, arquivos]
+        self.sizes = {}     # arquivo exibido -> tamanho
+        self.listings = {}  # pasta exibida -> entradas ou exceção da leitura
+        self._scan(path, max_depth)
+
+    def _scan(self, root, max_depth):
+        seen_inodes = set()
+        # ("enter", pasta, profundidade) desce; ("exit", pasta, pai, profundidade)
+        # soma os totais da pasta no pai depois que todas as filhas terminaram.
+        stack = [("exit", root, None, 0), ("enter", root, 0)]
+        totals = {}
+
+        while stack:
+            item = stack.pop()
+            if item[0] == "exit":
+                _, dir_path, parent, depth = item
+                size, count = totals[dir_path] if depth <= max_depth else totals.pop(dir_path)
+                if parent is not None:
+                    parent_totals = totals[parent]
+                    parent_totals[0] += size
+                    parent_totals[1] += count
+                continue
+
+            _, dir_path, depth = item
+            totals[dir_path] = dir_totals = [0, 0]
+            keep_listing = depth < max_depth
+            try:
+                with os.scandir(dir_path) as it:
+                    # Ordem fixa: o hardlink que recebe o crédito não depende do sistema de arquivos
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError as e:
+                if keep_listing:
+                    self.listings[dir_path] = e
+                continue
+
+            listing = []
+            subdirs = []
+            for entry in entries:
+                is_dir, is_file = _entry_flags(entry)
+                if keep_listing:
+                    listing.append((entry.name, entry.path, is_dir, is_file))
+                if is_dir:
+                    if not entry.is_symlink():
+                        subdirs.append(entry.path)
+                    elif keep_listing:
+                        # Link para pasta: exibido, mas sem conteúdo nem tamanho
+                        self.listings[entry.path] = []
+                        self.totals[entry.path] = [0, 0]
+                    continue
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                size = st.st_size
+                # st_ino == 0 quando o sistema não informa (ex: DirEntry no Windows)
+                if st.st_nlink > 1 and st.st_ino:
+                    key = (st.st_dev, st.st_ino)
+                    if key in seen_inodes:
+                        # Hardlink já contado: aparece na árvore, mas não soma
+                        if keep_listing:
+                            self.sizes[entry.path] = 0
+                        continue
+                    seen_inodes.add(key)
+                if keep_listing:
+                    self.sizes[entry.path] = size
+                if is_file:
+                    dir_totals[0] += size
+                    dir_totals[1] += 1
+
+            # Reverso para que a primeira subpasta seja visitada primeiro
+            for sub_path in reversed(subdirs):
+                stack.append(("exit", sub_path, dir_path, depth + 1))
+                stack.append(("enter", sub_path, depth + 1))
+
+            if keep_listing:
+                self.listings[dir_path] = listing
+
+        self.totals.update(totals)
+
+    def _entry_size(self, entry):
+        full_path = entry[1]
+        if full_path in self.totals:
+            return self.totals[full_path][0]
+        return self.sizes.get(full_path, 0)
+
+    def list_dir(self, path):
+        """Mesmo contrato de `scan_dir`, servido a partir da passada já feita."""
+        listing = self.listings.get(path, [])
+        if isinstance(listing, Exception):
+            raise listing
+        if self.sort_by_size:
+            return sorted(listing, key=lambda e: (-self._entry_size(e), e[0]))
+        return sorted(listing, key=lambda e: e[0])
+
+    def describe(self, path, is_dir):
+        """Sufixo exibido na linha da árvore: tamanho e, para pastas, arquivos."""
+        if is_dir:
+            size, count = self.totals.get(path, (0, 0))
+            return f"  [{format_size(size)}, {count} arquivo(s)]"
+        if path in self.sizes:
+            return f"  [{format_size(self.sizes[path])}]"
+        return ""
+
+
+def get_tree_structure(path, prefix="", is_last=True, output_list=None, current_depth=0, max_depth=5, max_items=50, use_icons=False, cache=None, workers=1, disk_usage=False, sort_by_size=False):
     """
     Gera a estrutura de árvore de um diretório como uma lista de strings.
     Substitui a antiga `mostrar_estrutura_streamlit`.
+    Para árvores grandes, prefira `iter_tree_structure`, que não materializa a lista.
     """
     if output_list is None:
         output_list = []
-        
-    try:
-        if current_depth == 0 and not os.path.exists(path):
-            return ["❌ Caminho não encontrado."]
 
-        name = os.path.basename(path)
-        display_name = name
-        
-        if use_icons:
-            icon = get_file_icon(name, os.path.isdir(path))
-            display_name = f"{icon}{name}"
-        elif os.path.isdir(path):
-            display_name += "/"
-            
-        connector = "└── " if is_last else "├── "
-        output_list.append(prefix + connector + display_name)
-        
-        if os.path.isdir(path):
-            if current_depth >= max_depth:
-                return output_list
-
-            try:
-                items = sorted(os.listdir(path))
-                original_count = len(items)
-                
-                has_hidden = False
-                if original_count > max_items:
-                    items = items[:max_items]
-                    has_hidden = True
-                
-                new_prefix = prefix + ("    " if is_last else "│   ")
-                
-                for i, item in enumerate(items):
-                    full_path = os.path.join(path, item)
-                    # If we have hidden items, the last visible item is NOT the last semantically
-                    is_last_item = (i == len(items) - 1) and not has_hidden
-                    
-                    get_tree_structure(full_path, new_prefix, is_last_item, output_list, current_depth + 1, max_depth, max_items, use_icons)
-                
-                if has_hidden:
-                    remaining = original_count - max_items
-                    output_list.append(new_prefix + f"... e mais {remaining} itens ocultos")
-
-            except PermissionError:
-                output_list.append(prefix + ("    " if is_last else "│   ") + "⛔ [Acesso Negado]")
-                
-    except PermissionError:
-        output_list.append(prefix + "    ⛔ [Acesso Negado]")
-    except Exception as e:
-        output_list.append(f"    ⚠️ [Erro: {e}]")
-        
+    output_list.extend(
+        iter_tree_structure(path, prefix, is_last, current_depth, max_depth, max_items, use_icons, cache, workers, disk_usage, sort_by_size)
+    )
     return output_list
 
-def list_files_in_dir(path):
+def spool_tree_structure(path, page_size=500, max_memory=8 * 1024 * 1024, on_progress=None, **tree_kwargs):
+    """
+    Percorre a árvore e grava as linhas num `SpooledTemporaryFile` à medida que
+    são geradas, sem montar a lista completa em memória.
+    Retorna (arquivo, offsets_das_paginas, total_de_linhas). O arquivo fica em
+    memória até `max_memory` bytes e depois passa automaticamente para o disco.
+    `on_progress(total_linhas, linhas_da_primeira_pagina)` é chamado a cada página.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory, mode="w+b")
+    page_offsets = [0]
+    first_page = []
+    total = 0
+
+    for line in iter_tree_structure(path, **tree_kwargs):
+        if total and total % page_size == 0:
+            page_offsets.append(spool.tell())
+            if on_progress:
+                on_progress(total, first_page)
+        if total < page_size:
+            first_page.append(line)
+        spool.write(line.encode("utf-8") + b"\n")
+        total += 1
+
+    if on_progress:
+        on_progress(total, first_page)
+    spool.seek(0)
+    return spool, page_offsets, total
+
+
+def read_spooled_page(spool, page_offsets, page):
+    """Lê uma página (base 0) de um arquivo gerado por `spool_tree_structure`."""
+    start = page_offsets[page]
+    spool.seek(start)
+    if page + 1 < len(page_offsets):
+        data = spool.read(page_offsets[page + 1] - start)
+    else:
+        data = spool.read()
+    spool.seek(0)
+    return data.decode("utf-8").rstrip("\n")
+
+
+def list_files_in_dir(path, cache=None):
     """
     Lista todos os arquivos de uma pasta.
     Retorna (lista_de_arquivos, texto_formatado, erro).
+    Se `cache` (um `DirIndex`) for informado, a listagem vem do índice em disco.
     """
     if not os.path.exists(path):
         return None, None, f"O caminho '{path}' não existe."
@@ -117,13 +376,8 @@ def list_files_in_dir(path):
         return None, None, f"'{path}' não é um diretório válido."
     
     try:
-        files = []
-        for item in os.listdir(path):
-            full_path = os.path.join(path, item)
-            if os.path.isfile(full_path):
-                files.append(item)
-        
-        files.sort()
+        list_dir = cache.list_dir if cache is not None else scan_dir
+        files = [name for name, _, _, is_file in list_dir(path) if is_file]
         
         # Texto formatado para relatório
         report = f"📂 Lista de arquivos: {path}\n"
@@ -138,6 +392,131 @@ def list_files_in_dir(path):
     except Exception as e:
         return None, None, f"Erro desconhecido: {e}"
 
+def iter_files(
+    path,
+    recursive=True,
+    pattern=None,
+    extensions=None,
+    min_size=None,
+    max_size=None,
+    min_mtime=None,
+    max_mtime=None,
+    skip_symlinks=False,
+    with_inode=False,
+):
+    """
+    Percorre os arquivos de uma pasta (e subpastas, se `recursive`) aplicando
+    filtros e gera tuplas (caminho_relativo, tamanho_bytes, mtime).
+    - pattern: glob aplicado ao nome do arquivo (ex: "*.log")
+    - extensions: extensões aceitas (ex: [".py", ".md"])
+    - min_size/max_size: faixa de tamanho em bytes
+    - min_mtime/max_mtime: faixa de modificação (timestamp)
+    - skip_symlinks: ignora links simbólicos para arquivos
+    - with_inode: acrescenta (st_dev, st_ino) à tupla, para identificar
+      hardlinks; None se o sistema não informar o inode
+    Tamanho e data vêm do `DirEntry.stat()`, chamado só para quem passou nos
+    filtros de nome. A ordem é determinística (nomes ordenados por pasta).
+    """
+    if extensions:
+        extensions = {e.lower() if e.startswith(".") else f".{e.lower()}" for e in extensions}
+    check_stat = any(v is not None for v in (min_size, max_size, min_mtime, max_mtime))
+
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            with os.scandir(os.path.join(path, rel_dir) if rel_dir else path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            is_dir, is_file = _entry_flags(entry)
+            if is_dir:
+                if recursive and not entry.is_symlink():
+                    subdirs.append(rel_path)
+                continue
+            if not is_file:
+                continue
+            if skip_symlinks and entry.is_symlink():
+                continue
+            if pattern and not fnmatch.fnmatch(entry.name, pattern):
+                continue
+            if extensions and os.path.splitext(entry.name)[1].lower() not in extensions:
+                continue
+
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            if check_stat:
+                if min_size is not None and st.st_size < min_size:
+                    continue
+                if max_size is not None and st.st_size > max_size:
+                    continue
+                if min_mtime is not None and st.st_mtime < min_mtime:
+                    continue
+                if max_mtime is not None and st.st_mtime > max_mtime:
+                    continue
+            if with_inode:
+                inode = (st.st_dev, st.st_ino) if st.st_ino else None
+                yield rel_path, st.st_size, st.st_mtime, inode
+            else:
+                yield rel_path, st.st_size, st.st_mtime
+
+        # Reverso para que a primeira subpasta seja visitada primeiro
+        stack.extend(reversed(subdirs))
+
+
+def export_file_list(rows, fmt="csv", max_memory=8 * 1024 * 1024, on_progress=None, progress_every=1000):
+    """
+    Grava as linhas de `iter_files` num `SpooledTemporaryFile` em CSV ou JSONL,
+    sem manter a lista em memória.
+    Retorna (arquivo, total). `on_progress(total)` é chamado a cada `progress_every` linhas.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory, mode="w+b")
+    text = _Utf8Writer(spool)
+    total = 0
+
+    if fmt == "csv":
+        writer = csv.writer(text)
+        writer.writerow(["caminho", "tamanho_bytes", "modificado_em"])
+        for rel_path, size, mtime in rows:
+            writer.writerow([rel_path, size, format_mtime(mtime)])
+            total += 1
+            if on_progress and total % progress_every == 0:
+                on_progress(total)
+    elif fmt == "jsonl":
+        for rel_path, size, mtime in rows:
+            text.write(json.dumps({"caminho": rel_path, "tamanho_bytes": size, "modificado_em": format_mtime(mtime)}, ensure_ascii=False))
+            text.write("\n")
+            total += 1
+            if on_progress and total % progress_every == 0:
+                on_progress(total)
+    else:
+        raise ValueError(f"Formato de exportação inválido: {fmt}")
+
+    spool.seek(0)
+    return spool, total
+
+
+class _Utf8Writer:
+    """Adaptador mínimo de texto -> bytes para escrever num arquivo binário."""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def write(self, text):
+        return self.raw.write(text.encode("utf-8"))
+
+
+def format_mtime(mtime):
+    """Data de modificação em hora local, ISO 8601 (como nas exportações)."""
+    return datetime.fromtimestamp(mtime).isoformat(timespec="seconds")
+
+
 def get_default_path():
     """Retorna o diretório atual de trabalho de forma segura."""
     return os.getcwd()
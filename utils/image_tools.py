@@ -1,5 +1,11 @@
-from PIL import Image
+from PIL import Image, features
 import io
+import json
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
 
 
 def calculate_new_dimensions(width, height, mode, value):
@@ -18,22 +24,72 @@ def calculate_new_dimensions(width, height, mode, value):
     return new_w, new_h
 
 
-def process_image_resize(image_file, mode, value):
+# A partir desta razão de redução vale decodificar já reduzido
+DRAFT_MIN_RATIO = 2
+# O draft decodifica com folga sobre o tamanho final; o LANCZOS faz o resto
+DRAFT_MARGIN = 2
+# reducing_gap do Pillow: reduz por blocos inteiros antes do LANCZOS final
+REDUCING_GAP = 3.0
+
+
+def _downscale(img, new_w, new_h):
     """
-    Processa o redimensionamento de uma imagem.
-    Retorna: (bytes_da_imagem, string_dimensoes, formato)
+    Resize com alta qualidade (LANCZOS). Em reduções grandes, JPEGs são
+    decodificados já em escala menor (`Image.draft`, escala no domínio DCT,
+    com folga de `DRAFT_MARGIN` sobre o tamanho final) e o `reducing_gap` faz
+    uma redução rápida por blocos antes do filtro, mantendo a qualidade
+    próxima da decodificação completa.
     """
-    img = Image.open(image_file)
     w, h = img.size
+    if new_w * DRAFT_MIN_RATIO > w or new_h * DRAFT_MIN_RATIO > h:
+        return img.resize((new_w, new_h), Image.Resampling.LANCZOS)
 
-    new_w, new_h = calculate_new_dimensions(w, h, mode, value)
+    if img.format == "JPEG":
+        img.draft(img.mode, (new_w * DRAFT_MARGIN, new_h * DRAFT_MARGIN))
+    return img.resize((new_w, new_h), Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
 
-    # Resize com alta qualidade (LANCZOS)
-    img_resized = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
 
-    # Salvar em buffer
-    buf = io.BytesIO()
+def _resize_cache_key(cache, image_file, mode, value, output_format=None, max_bytes=None, min_ssim=None):
+    return cache.make_key(
+        "image_resize",
+        [image_file],
+        mode=mode,
+        value=value,
+        type=getattr(image_file, "type", None),
+        output_format=output_format,
+        max_bytes=max_bytes,
+        min_ssim=min_ssim,
+    )
 
+
+def process_image_resize(image_file, mode, value, cache=None, output_format=None, max_bytes=None, min_ssim=None):
+    """
+    Processa o redimensionamento de uma imagem.
+    Retorna: (bytes_da_imagem, string_dimensoes, formato)
+    `output_format` ("JPEG", "WEBP" ou "AVIF") troca o formato de saída; com
+    `max_bytes` e/ou `min_ssim` a qualidade é escolhida por
+    `encode_with_quality_search` em vez do `quality=90` fixo (ValueError se
+    o formato final não for um desses).
+    Se `cache` (um `ResultCache`) for informado, a mesma imagem com os mesmos
+    parâmetros é servida do disco sem decodificar de novo.
+    """
+    encoding = (output_format, max_bytes, min_ssim)
+    if cache is not None:
+        key = _resize_cache_key(cache, image_file, mode, value, *encoding)
+        hit = cache.get_bytes(key)
+        if hit is not None:
+            data, meta = hit
+            return data, meta["dims"], meta["fmt"]
+        data, dims, fmt = process_image_resize(image_file, mode, value, None, *encoding)
+        cache.put(key, data, {"dims": dims, "fmt": fmt})
+        return data, dims, fmt
+
+    _, data, dims, fmt = _resize_and_encode(image_file, mode, value, *encoding)
+    return data, dims, fmt
+
+
+def _output_format(image_file, img):
+    """Formato de saída: o do upload (MIME) ou o da imagem, com fallback para JPEG."""
     # Tenta obter formato do arquivo, fallback para JPEG se incerto
     try:
         if hasattr(image_file, "type"):
@@ -45,10 +101,310 @@ def process_image_resize(image_file, mode, value):
 
     if fmt == "JPG":
         fmt = "JPEG"
+    return fmt
+
+
+def _resize_and_encode(image_file, mode, value, output_format=None, max_bytes=None, min_ssim=None):
+    """Núcleo de `process_image_resize`; devolve também a imagem PIL reduzida."""
+    img = Image.open(image_file)
+    w, h = img.size
 
-    # Conversão segura para JPEG (remove canal alpha)
-    if fmt == "JPEG" and img_resized.mode in ("RGBA", "P"):
+    new_w, new_h = calculate_new_dimensions(w, h, mode, value)
+
+    img_resized = _downscale(img, new_w, new_h)
+
+    fmt = output_format or _output_format(image_file, img)
+
+    # Conversão segura para JPEG (remove canal alpha, modos LA, I;16 etc.)
+    if fmt == "JPEG" and img_resized.mode not in ("RGB", "L"):
         img_resized = img_resized.convert("RGB")
 
-    img_resized.save(buf, format=fmt, quality=90)
-    return buf.getvalue(), f"{new_w}x{new_h}", fmt
+    return img_resized, _encode(img_resized, fmt, max_bytes, min_ssim), f"{new_w}x{new_h}", fmt
+
+
+def _encode(img, fmt, max_bytes=None, min_ssim=None):
+    """
+    Codifica com `quality=90` ou, com alvo definido, pela busca de qualidade.
+    Alvo em formato sem ajuste de qualidade (ex.: PNG) levanta ValueError.
+    """
+    if max_bytes or min_ssim:
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"Tamanho máximo/SSIM mínimo não se aplicam a {fmt}; escolha JPEG, WEBP ou AVIF"
+            )
+        data, _, _ = encode_with_quality_search(img, fmt, max_bytes, min_ssim)
+        return data
+
+    # Salvar em buffer
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, quality=90)
+    return buf.getvalue()
+
+
+# Formatos com perdas em que a qualidade pode ser ajustada
+OUTPUT_FORMATS = ("JPEG", "WEBP", "AVIF")
+QUALITY_RANGE = (10, 95)
+_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "AVIF": "avif"}
+
+
+def _check_format(fmt):
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato sem ajuste de qualidade: {fmt}")
+    if fmt in ("WEBP", "AVIF") and not features.check(fmt.lower()):
+        raise ValueError(f"Esta instalação do Pillow não tem suporte a {fmt}")
+
+
+def _box(a, k):
+    """Média móvel k x k (janela válida) via somas acumuladas."""
+    c = np.cumsum(np.cumsum(np.pad(a, ((1, 0), (1, 0))), axis=0), axis=1)
+    return (c[k:, k:] - c[:-k, k:] - c[k:, :-k] + c[:-k, :-k]) / (k * k)
+
+
+def _ssim(ref, img, k=7):
+    """SSIM médio em luminância (janela uniforme k x k); 1.0 = idênticas."""
+    a = np.asarray(ref.convert("L"), dtype=np.float64)
+    b = np.asarray(img.convert("L"), dtype=np.float64)
+    if min(a.shape) < k:
+        return 1.0 if np.array_equal(a, b) else 0.0
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mu_a, mu_b = _box(a, k), _box(b, k)
+    var_a = _box(a * a, k) - mu_a ** 2
+    var_b = _box(b * b, k) - mu_b ** 2
+    cov = _box(a * b, k) - mu_a * mu_b
+    s = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+    return float(s.mean())
+
+
+def encode_with_quality_search(img, fmt, max_bytes=None, min_ssim=None, quality_range=QUALITY_RANGE):
+    """
+    Codifica `img` em `fmt` (JPEG, WEBP ou AVIF) escolhendo a qualidade por
+    busca binária, com todas as codificações em memória:
+    - `max_bytes`: maior qualidade cujo arquivo cabe no limite;
+    - `min_ssim`: menor qualidade cujo SSIM (vs. a imagem sem perdas) atinge o piso.
+    Com os dois, o limite de bytes prevalece. Se nem a qualidade mínima couber
+    em `max_bytes`, devolve a menor codificação possível.
+    Retorna (bytes, qualidade, ssim) — ssim é None quando não foi pedido.
+    """
+    _check_format(fmt)
+    if fmt == "JPEG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    lo_q, hi_q = quality_range
+    encoded = {}
+
+    def encode(q):
+        if q not in encoded:
+            buf = io.BytesIO()
+            img.save(buf, format=fmt, quality=q)
+            encoded[q] = buf.getvalue()
+        return encoded[q]
+
+    def ssim_at(q):
+        return _ssim(img, Image.open(io.BytesIO(encode(q))))
+
+    quality = hi_q
+    if min_ssim:
+        # Menor qualidade que ainda atinge o piso de SSIM
+        lo, hi = lo_q, hi_q
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if ssim_at(mid) >= min_ssim:
+                hi = mid
+            else:
+                lo = mid + 1
+        quality = lo
+
+    if max_bytes and len(encode(quality)) > max_bytes:
+        # Maior qualidade (até a atual) que cabe no limite
+        lo, hi = lo_q, quality
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if len(encode(mid)) <= max_bytes:
+                lo = mid
+            else:
+                hi = mid - 1
+        quality = lo
+
+    return encode(quality), quality, (ssim_at(quality) if min_ssim else None)
+
+
+def output_file_name(name, fmt):
+    """Troca a extensão de `name` quando o formato de saída é outro."""
+    stem, ext = os.path.splitext(name)
+    if ext.lstrip(".").upper().replace("JPG", "JPEG") == fmt:
+        return name
+    return f"{stem}.{_EXTENSIONS.get(fmt, fmt.lower())}"
+
+
+class _UploadedBytes(io.BytesIO):
+    """Bytes de uma imagem com o `type` (MIME) do upload, enviados aos processos."""
+
+    def __init__(self, data, type=None):
+        super().__init__(data)
+        if type:
+            self.type = type
+
+
+def make_thumbnail(image, max_size=320):
+    """
+    Gera uma miniatura JPEG (lado maior = `max_size`) para pré-visualização.
+    Aceita uma imagem PIL ou bytes de imagem.
+    """
+    if isinstance(image, (bytes, bytearray)):
+        image = Image.open(io.BytesIO(image))
+        image.draft("RGB", (max_size, max_size))
+    thumb = image.copy()
+    thumb.thumbnail((max_size, max_size), Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
+    if thumb.mode not in ("RGB", "L"):
+        thumb = thumb.convert("RGB")
+    buf = io.BytesIO()
+    thumb.save(buf, "JPEG", quality=80)
+    return buf.getvalue()
+
+
+def _resize_worker(data, mime_type, mode, value, thumbnail_size=None, encoding=(None, None, None)):
+    """Executado nos processos do pool."""
+    img_resized, data, dims, fmt = _resize_and_encode(_UploadedBytes(data, mime_type), mode, value, *encoding)
+    if thumbnail_size:
+        return data, dims, fmt, make_thumbnail(img_resized, thumbnail_size)
+    return data, dims, fmt
+
+
+def resize_images_parallel(
+    image_files,
+    mode,
+    value,
+    workers=None,
+    cache=None,
+    thumbnail_size=None,
+    output_format=None,
+    max_bytes=None,
+    min_ssim=None,
+):
+    """
+    Redimensiona um lote de imagens num pool de processos.
+    Gera (indice, resultado, erro) na ordem de conclusão, onde resultado é o
+    mesmo retorno de `process_image_resize` (ou None se houve erro). Uma
+    falha numa imagem não interrompe as demais.
+    Com `thumbnail_size`, o resultado ganha um 4º item: miniatura JPEG gerada
+    a partir da imagem já reduzida, no mesmo processo.
+    `output_format`, `max_bytes` e `min_ssim` funcionam como em
+    `process_image_resize`; a busca de qualidade roda nos processos.
+    Com `cache`, imagens já processadas saem na hora, sem ir para o pool.
+    """
+    encoding = (output_format, max_bytes, min_ssim)
+    pending = []
+    for i, image_file in enumerate(image_files):
+        if cache is not None:
+            try:
+                hit = cache.get_bytes(_resize_cache_key(cache, image_file, mode, value, *encoding))
+            except Exception:
+                hit = None
+            if hit is not None:
+                data, meta = hit
+                result = (data, meta["dims"], meta["fmt"])
+                if thumbnail_size:
+                    result += (make_thumbnail(data, thumbnail_size),)
+                yield i, result, None
+                continue
+        pending.append(i)
+
+    if not pending:
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for i in pending:
+            image_file = image_files[i]
+            image_file.seek(0)
+            future = executor.submit(
+                _resize_worker,
+                image_file.read(),
+                getattr(image_file, "type", None),
+                mode,
+                value,
+                thumbnail_size,
+                encoding,
+            )
+            futures[future] = i
+
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                yield i, None, e
+                continue
+            if cache is not None:
+                data, dims, fmt = result[:3]
+                # Falha ao gravar no cache (disco cheio, banco travado) não perde o resultado
+                try:
+                    key = _resize_cache_key(cache, image_files[i], mode, value, *encoding)
+                    cache.put(key, data, {"dims": dims, "fmt": fmt})
+                except Exception:
+                    pass
+            yield i, result, None
+
+
+RESPONSIVE_WIDTHS = (320, 640, 1280, 1920)
+
+
+def build_responsive_set(
+    image_file,
+    widths=RESPONSIVE_WIDTHS,
+    output=None,
+    name=None,
+    output_format=None,
+    max_bytes=None,
+    min_ssim=None,
+):
+    """
+    Gera a mesma imagem em várias larguras (conjunto responsivo) a partir de
+    uma única decodificação. As versões são feitas em cascata: cada largura é
+    reduzida a partir da imediatamente maior, não do original.
+    Larguras maiores que a original são ignoradas (não há ampliação).
+
+    `output_format`, `max_bytes` e `min_ssim` valem para cada versão, como
+    em `process_image_resize`.
+
+    Grava tudo num ZIP (em `output`, se informado, senão em memória) junto com
+    `manifest.json`, que traz o atributo `srcset` pronto e os dados de cada
+    arquivo. Retorna (zip, manifesto).
+    """
+    img = Image.open(image_file)
+    fmt = output_format or _output_format(image_file, img)
+    w, h = img.size
+    stem = os.path.splitext(name or getattr(image_file, "name", None) or "imagem")[0]
+    ext = _EXTENSIONS.get(fmt, fmt.lower())
+
+    targets = sorted({tw for tw in widths if 0 < tw <= w}, reverse=True)
+    if not targets:
+        raise ValueError(f"Nenhuma largura solicitada cabe na imagem original ({w}px)")
+
+    zip_buffer = output if output is not None else io.BytesIO()
+    sizes = []
+    current = img
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_STORED) as zip_file:
+        for tw in targets:
+            th = max(1, round(h * tw / w))
+            # Só a primeira redução decodifica o arquivo (com draft, se JPEG)
+            current = _downscale(current, tw, th)
+            if fmt == "JPEG" and current.mode not in ("RGB", "L"):
+                current = current.convert("RGB")
+
+            data = _encode(current, fmt, max_bytes, min_ssim)
+            file_name = f"{stem}-{tw}w.{ext}"
+            zip_file.writestr(file_name, data)
+            sizes.append({"arquivo": file_name, "largura": tw, "altura": th, "bytes": len(data)})
+
+        sizes.reverse()
+        manifest = {
+            "original": {"largura": w, "altura": h, "formato": img.format},
+            "formato": fmt,
+            "srcset": ", ".join(f"{s['arquivo']} {s['largura']}w" for s in sizes),
+            "src": sizes[-1]["arquivo"],
+            "versoes": sizes,
+        }
+        zip_file.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+
+    zip_buffer.seek(0)
+    return zip_buffer, manifest
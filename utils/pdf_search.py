@@ -0,0 +1,132 @@
+import hashlib
+import os
+import time
+
+from utils.pdf_tools import extract_page_texts
+from utils.sqlite_store import CACHE_ROOT, SqliteStore, shared_instance
+
+DEFAULT_DB_PATH = os.path.join(CACHE_ROOT, "pdf_search.sqlite3")
+
+
+def _fts_query(text):
+    """
+    Converte o texto digitado numa consulta FTS5 segura: cada palavra vira um
+    termo entre aspas (todos obrigatórios). Um `*` no fim da palavra busca
+    por prefixo (ex: "contrat*").
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms)
+
+
+class PdfSearchIndex(SqliteStore):
+    """
+    Índice de texto completo (SQLite FTS5) das páginas de PDFs.
+    Cada documento é identificado pelo SHA-256 do conteúdo: reenviar o mesmo
+    arquivo, mesmo com outro nome, não gera uma nova extração.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        super().__init__(db_path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_hash TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                pages INTEGER NOT NULL,
+                indexed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(
+                text,
+                doc_hash UNINDEXED,
+                page UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+            """
+        )
+        self._conn.commit()
+
+    def add_document(self, name, pdf_bytes, workers=1):
+        """
+        Indexa um PDF. Retorna (doc_hash, ja_indexado): documentos já
+        presentes no índice não são extraídos novamente.
+        """
+        doc_hash = hashlib.sha256(pdf_bytes).hexdigest()
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM documents WHERE doc_hash = ?", (doc_hash,)
+            ).fetchone()
+        if exists:
+            return doc_hash, True
+
+        texts = extract_page_texts(pdf_bytes, workers=workers)
+
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO page_text (text, doc_hash, page) VALUES (?, ?, ?)",
+                    ((text, doc_hash, i + 1) for i, text in texts if text.strip()),
+                )
+                self._conn.execute(
+                    "INSERT INTO documents VALUES (?, ?, ?, ?)",
+                    (doc_hash, name, len(texts), time.time()),
+                )
+        return doc_hash, False
+
+    def search(self, query, limit=50):
+        """
+        Busca ranqueada (BM25) por palavras-chave.
+        Retorna lista de dicts com documento, página, trecho e pontuação.
+        """
+        fts_query = _fts_query(query)
+        if not fts_query:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT d.name, p.page, snippet(page_text, 0, '**', '**', ' … ', 16), bm25(page_text)
+                FROM page_text p JOIN documents d ON d.doc_hash = p.doc_hash
+                WHERE page_text MATCH ?
+                ORDER BY bm25(page_text)
+                LIMIT ?
+                """,
+                (fts_query, limit),
+            ).fetchall()
+        return [
+            {"documento": name, "pagina": page, "trecho": snippet, "pontuacao": -score}
+            for name, page, snippet, score in rows
+        ]
+
+    def list_documents(self):
+        """Retorna (nome, páginas, indexado_em) dos documentos indexados."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT name, pages, indexed_at FROM documents ORDER BY indexed_at DESC"
+            ).fetchall()
+
+    def remove_document(self, doc_hash):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM page_text WHERE doc_hash = ?", (doc_hash,))
+                self._conn.execute("DELETE FROM documents WHERE doc_hash = ?", (doc_hash,))
+
+    def clear(self):
+        """Remove todos os documentos do índice."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM page_text")
+                self._conn.execute("DELETE FROM documents")
+
+
+@shared_instance
+def get_search_index():
+    """Retorna a instância compartilhada do índice de busca no caminho padrão."""
+    return PdfSearchIndex()
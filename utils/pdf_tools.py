@@ -4,12 +4,38 @@ from PyPDF2 import PdfMerger
 from PIL import Image
 import zipfile
 import os
+import shutil
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
-def merge_pdf_bytes(pdf_files):
+MERGE_ENGINES = ("pypdf2", "pymupdf")
+
+
+def merge_pdf_bytes(pdf_files, engine="pypdf2", cache=None):
     """
     Recebe uma lista de objetos file-like (bytes) de PDFs.
     Retorna os bytes do PDF unificado ou levanta exceção.
+    `engine`: "pypdf2" (PdfMerger) ou "pymupdf" (mais rápido, remove objetos
+    duplicados como fontes e imagens repetidas e comprime os streams).
+    Se `cache` (um `ResultCache`) for informado, o resultado é reaproveitado
+    quando os mesmos arquivos já foram unificados com o mesmo motor.
     """
+    if engine not in MERGE_ENGINES:
+        raise ValueError(f"Motor de unificação inválido: {engine}")
+
+    if cache is not None:
+        key = cache.make_key("merge_pdf", pdf_files, engine=engine)
+        hit = cache.get_bytes(key)
+        if hit is not None:
+            return hit[0]
+        merged = merge_pdf_bytes(pdf_files, engine)
+        cache.put(key, merged)
+        return merged
+
+    if engine == "pymupdf":
+        return _merge_pdf_bytes_pymupdf(pdf_files)
+
     merger = PdfMerger()
     output_buffer = io.BytesIO()
     
@@ -26,70 +52,396 @@ def merge_pdf_bytes(pdf_files):
     except Exception as e:
         raise Exception(f"Erro na unificação: {str(e)}")
 
-def convert_pdf_to_images(pdf_bytes, img_format="PNG", dpi=150):
+
+def _merge_pdf_bytes_pymupdf(pdf_files):
+    """Unificação com PyMuPDF (`insert_pdf`) e coleta de lixo com deduplicação."""
+    merged = fitz.open()
+    try:
+        for f in pdf_files:
+            f.seek(0)
+            with fitz.open(stream=f.read(), filetype="pdf") as src:
+                merged.insert_pdf(src)
+
+        # garbage=4: remove objetos não usados e unifica objetos/streams idênticos
+        return merged.tobytes(garbage=4, deflate=True, use_objstms=1)
+    except Exception as e:
+        raise Exception(f"Erro na unificação: {str(e)}")
+    finally:
+        merged.close()
+
+
+def merge_pdf_to_file(pdf_files, output_path, on_progress=None, batch_size=20, cache=None):
+    """
+    Unificação com memória limitada para lotes grandes (PyMuPDF).
+    A cada `batch_size` entradas o resultado parcial é gravado em
+    `output_path` (a primeira vez por completo, depois de forma incremental)
+    e reaberto do disco: o PyMuPDF só carrega os objetos sob demanda, então
+    o documento em construção não acumula o grafo de objetos de todo o lote.
+    Usa garbage=1 (só remove objetos não usados) na primeira gravação: a
+    deduplicação de streams do modo rápido precisaria de todo o conteúdo em
+    memória, e gravações incrementais não podem reescrever o arquivo.
+    `on_progress(feitos, total)` é chamado a cada arquivo anexado.
+    Com `cache` (um `ResultCache`), um resultado já calculado é copiado do disco.
+    """
+    if cache is not None:
+        key = cache.make_key("merge_pdf_to_file", pdf_files)
+        hit = cache.get(key)
+        if hit is not None:
+            shutil.copyfile(hit[0], output_path)
+            if on_progress:
+                on_progress(len(pdf_files), len(pdf_files))
+            return output_path
+        merge_pdf_to_file(pdf_files, output_path, on_progress, batch_size)
+        with open(output_path, "rb") as merged_file:
+            cache.put(key, merged_file)
+        return output_path
+
+    merged = fitz.open()
+    saved = False
+    try:
+        for i, f in enumerate(pdf_files, start=1):
+            # Garante que estamos no inicio do arquivo
+            f.seek(0)
+            with fitz.open(stream=f.read(), filetype="pdf") as src:
+                merged.insert_pdf(src)
+            if on_progress:
+                on_progress(i, len(pdf_files))
+
+            if i % batch_size == 0 or i == len(pdf_files):
+                if saved:
+                    merged.save(output_path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+                else:
+                    merged.save(output_path, garbage=1, deflate=True)
+                    saved = True
+                merged.close()
+                merged = fitz.open(output_path)
+        return output_path
+    except Exception as e:
+        raise Exception(f"Erro na unificação: {str(e)}")
+    finally:
+        merged.close()
+
+
+def _downsample_image(xref, image_bytes, scale, jpeg_quality, stream_size):
+    """
+    Executado nos processos do pool: reduz uma imagem pela escala dada e
+    recomprime em JPEG. Retorna (xref, novos_bytes) ou (xref, None) se não
+    houver ganho sobre o stream original (`stream_size`, como está no PDF)
+    ou a imagem não puder ser lida.
+    """
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        new_size = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+        # JPEG: decodifica já reduzido (escala DCT) quando possível
+        img.draft("RGB", new_size)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img = img.resize(new_size, Image.Resampling.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=jpeg_quality, optimize=True)
+    except Exception:
+        return xref, None
+    data = buf.getvalue()
+    return xref, data if len(data) < stream_size else None
+
+
+def _image_display_dpi(doc):
+    """
+    Menor DPI efetivo com que cada imagem (xref) aparece no documento:
+    pixels da imagem divididos pelo tamanho exibido na página, em polegadas.
+    """
+    dpi_by_xref = {}
+    for page in doc:
+        for info in page.get_image_info(xrefs=True):
+            xref = info.get("xref")
+            bbox = fitz.Rect(info["bbox"])
+            if not xref or bbox.width <= 0 or bbox.height <= 0:
+                continue
+            dpi = min(info["width"] / (bbox.width / 72), info["height"] / (bbox.height / 72))
+            # Se a imagem aparece em tamanhos diferentes, vale o maior tamanho exibido
+            dpi_by_xref[xref] = min(dpi_by_xref.get(xref, dpi), dpi)
+    return dpi_by_xref
+
+
+def _has_mask(doc, xref):
+    """
+    Imagens que são ou usam máscara (SMask, /Mask, /ImageMask ou 1 bit por
+    componente): viram blocos opacos se recomprimidas em JPEG.
+    """
+    if doc.xref_get_key(xref, "ImageMask")[1] == "true":
+        return True
+    if doc.xref_get_key(xref, "BitsPerComponent")[1] == "1":
+        return True
+    return any(doc.xref_get_key(xref, key)[0] != "null" for key in ("SMask", "Mask"))
+
+
+def compress_pdf_bytes(pdf_bytes, target_dpi=150, jpeg_quality=75, workers=1, on_progress=None):
+    """
+    Reduz o tamanho de um PDF reamostrando as imagens embutidas acima de
+    `target_dpi` e recomprimindo-as em JPEG (`jpeg_quality`). O trabalho de
+    imagem roda num pool de processos quando `workers > 1`.
+    Imagens com transparência ou máscara (veja `_has_mask`) são mantidas
+    como estão.
+    Retorna (bytes_do_pdf, estatisticas) onde estatisticas tem
+    "imagens", "reduzidas", "tamanho_original" e "tamanho_final".
+    """
+    try:
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        dpi_by_xref = _image_display_dpi(doc)
+
+        jobs = []
+        for xref, dpi in dpi_by_xref.items():
+            if dpi <= target_dpi * 1.1:
+                continue
+            if _has_mask(doc, xref):
+                continue
+            info = doc.extract_image(xref)
+            if not info:
+                continue
+            jobs.append((xref, info["image"], target_dpi / dpi, len(doc.xref_stream_raw(xref))))
+
+        replaced = 0
+        if jobs:
+            executor = ProcessPoolExecutor(max_workers=workers) if workers and workers > 1 else None
+            try:
+                if executor is not None:
+                    xrefs, images, scales, sizes = zip(*jobs)
+                    results = executor.map(_downsample_image, xrefs, images, scales, repeat(jpeg_quality), sizes)
+                else:
+                    results = (
+                        _downsample_image(xref, data, scale, jpeg_quality, size)
+                        for xref, data, scale, size in jobs
+                    )
+
+                # Qualquer página serve para substituir: o xref é do documento
+                page = doc[0]
+                for done, (xref, new_bytes) in enumerate(results, start=1):
+                    if new_bytes is not None:
+                        page.replace_image(xref, stream=new_bytes)
+                        replaced += 1
+                    if on_progress:
+                        on_progress(done, len(jobs))
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+
+        output = doc.tobytes(garbage=4, deflate=True, use_objstms=1)
+        doc.close()
+
+        stats = {
+            "imagens": len(dpi_by_xref),
+            "reduzidas": replaced,
+            "tamanho_original": len(pdf_bytes),
+            "tamanho_final": len(output),
+        }
+        # Sem ganho: devolve o original intacto
+        if len(output) >= len(pdf_bytes):
+            stats["reduzidas"] = 0
+            stats["tamanho_final"] = len(pdf_bytes)
+            return pdf_bytes, stats
+        return output, stats
+
+    except Exception as e:
+        raise Exception(f"Erro na compressão: {str(e)}")
+
+
+def _render_page(doc, page_index, img_format, dpi):
+    """
+    Renderiza uma página e retorna (bytes_da_imagem, extensao).
+    Codifica uma única vez, direto do pixmap: PNG pelo próprio MuPDF e JPEG
+    pelo PIL a partir do buffer de amostras do pixmap (sem cópia).
+    """
+    page = doc[page_index]
+    matrix = fitz.Matrix(dpi/72, dpi/72)
+    pix = page.get_pixmap(matrix=matrix)
+
+    if img_format.upper() == 'JPEG':
+        mode = "RGBA" if pix.alpha else "RGB"
+        img = Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, "raw", mode, pix.stride, 1)
+        # Tratamento especial para JPEG (remover alpha se houver)
+        if pix.alpha:
+            img = img.convert('RGB')
+        img_buffer = io.BytesIO()
+        img.save(img_buffer, 'JPEG', quality=95)
+        return img_buffer.getvalue(), 'jpg'
+
+    return pix.tobytes('png'), 'png'
+
+
+# Documento aberto uma única vez em cada processo do pool
+_worker_doc = None
+
+
+def _init_render_worker(pdf_bytes):
+    global _worker_doc
+    _worker_doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+
+
+def _render_page_range(page_range, img_format, dpi):
+    """Executado nos processos do pool: renderiza um bloco de páginas."""
+    return [(i, *_render_page(_worker_doc, i, img_format, dpi)) for i in page_range]
+
+
+def _iter_rendered_pages(pdf_bytes, doc, img_format, dpi, workers, chunk_size, pages):
+    """
+    Gera (indice, bytes, ext) na ordem de `pages`. Com `workers > 1`, cada
+    processo do pool abre o documento e renderiza blocos de `chunk_size` páginas.
+    """
+    if not workers or workers <= 1 or len(pages) <= chunk_size:
+        for i in pages:
+            yield (i, *_render_page(doc, i, img_format, dpi))
+        return
+
+    chunks = [pages[start:start + chunk_size] for start in range(0, len(pages), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker, initargs=(pdf_bytes,)) as executor:
+        # Janela limitada de blocos em andamento, consumidos na ordem de envio:
+        # mantém a ordem das páginas sem acumular o documento inteiro em memória
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(executor.submit(_render_page_range, chunk, img_format, dpi))
+            if len(in_flight) >= workers * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def _extract_page_range(page_range):
+    """Executado nos processos do pool: extrai o texto de um bloco de páginas."""
+    return [(i, _worker_doc[i].get_text()) for i in page_range]
+
+
+def extract_page_texts(pdf_bytes, workers=1, chunk_size=16):
+    """
+    Extrai o texto de todas as páginas. Retorna lista de (indice, texto).
+    Com `workers > 1`, blocos de páginas são processados em paralelo, cada
+    processo com sua própria cópia aberta do documento.
+    """
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        total_pages = doc.page_count
+        if not workers or workers <= 1 or total_pages <= chunk_size:
+            return [(i, doc[i].get_text()) for i in range(total_pages)]
+
+    chunks = [range(start, min(start + chunk_size, total_pages)) for start in range(0, total_pages, chunk_size)]
+    texts = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker, initargs=(pdf_bytes,)) as executor:
+        for extracted in executor.map(_extract_page_range, chunks):
+            texts.extend(extracted)
+    return texts
+
+
+def parse_page_range(text, total_pages):
+    """
+    Interpreta uma seleção de páginas como "1-3,10,20-25" (base 1).
+    Retorna a lista ordenada e sem repetição de índices (base 0).
+    Texto vazio seleciona todas as páginas. Levanta ValueError se inválido
+    ou se a seleção não tiver nenhuma página (ex: ",").
+    """
+    if not text or not text.strip():
+        return list(range(total_pages))
+
+    selected = set()
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                start, end = (int(x) for x in part.split("-", 1))
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise ValueError(f"Trecho inválido: '{part}'")
+        if start < 1 or end > total_pages or start > end:
+            raise ValueError(f"Intervalo fora do documento (1-{total_pages}): '{part}'")
+        selected.update(range(start - 1, end))
+    if not selected:
+        raise ValueError("Nenhuma página selecionada")
+    return sorted(selected)
+
+
+def count_pages(pdf_bytes):
+    """Número de páginas do PDF, sem renderizar nada."""
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return doc.page_count
+
+
+def render_thumbnails(pdf_bytes, dpi=24, pages=None):
+    """
+    Renderiza miniaturas JPEG em baixa resolução das páginas `pages`
+    (índices a partir de 0; None = todas).
+    """
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        if pages is None:
+            pages = range(doc.page_count)
+        return [_render_page(doc, i, "JPEG", dpi)[0] for i in pages]
+    finally:
+        doc.close()
+
+
+def convert_pdf_to_images(pdf_bytes, img_format="PNG", dpi=150, workers=1, on_progress=None, chunk_size=4, output=None, pages=None, cache=None):
     """
     Converte bytes de um PDF em imagens.
     Se 1 página -> retorna (img_bytes, 1, ext)
     Se >1 páginas -> retorna (zip_bytes, total_pages, 'zip')
+    `pages` (índices base 0, ver `parse_page_range`) limita a conversão a
+    essas páginas; os nomes no ZIP mantêm a numeração original.
+    Com `workers > 1`, as páginas são renderizadas em paralelo por um pool de
+    processos. `on_progress(feitas, total)` é chamado a cada página gravada.
+    Se `output` (arquivo binário gravável, ex: temporário em disco) for
+    informado, o ZIP é gravado nele página a página e a função retorna
+    (output, total_pages, 'zip'): a memória fica em torno de uma página.
+    Se `cache` (um `ResultCache`) for informado, conversões já feitas com o
+    mesmo PDF, formato, DPI e páginas são servidas do disco.
     """
+    if cache is not None:
+        key = cache.make_key("pdf_to_images", [pdf_bytes], img_format=img_format.upper(), dpi=dpi, pages=pages)
+        hit = cache.get(key)
+        if hit is not None:
+            path, meta = hit
+            if on_progress:
+                on_progress(meta["total"], meta["total"])
+            if output is not None and meta["ext"] == "zip":
+                with open(path, "rb") as cached:
+                    shutil.copyfileobj(cached, output)
+                output.seek(0)
+                return output, meta["total"], "zip"
+            with open(path, "rb") as cached:
+                return cached.read(), meta["total"], meta["ext"]
+
+        data, total_pages, ext = convert_pdf_to_images(pdf_bytes, img_format, dpi, workers, on_progress, chunk_size, output, pages)
+        cache.put(key, data, {"total": total_pages, "ext": ext})
+        return data, total_pages, ext
+
     try:
         doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        total_pages = doc.page_count
+        if pages is None:
+            pages = list(range(doc.page_count))
+        total_pages = len(pages)
         
         # Se for apenas 1 página, retorna a imagem direto
         if total_pages == 1:
-            page = doc[0]
-            matrix = fitz.Matrix(dpi/72, dpi/72)
-            pix = page.get_pixmap(matrix=matrix)
-            
-            img_format_lower = img_format.lower()
-            
-            # Tratamento especial para JPEG (remover alpha se houver)
-            if img_format.upper() == 'JPEG':
-                img = Image.open(io.BytesIO(pix.tobytes(img_format_lower)))
-                img = img.convert('RGB')
-                output_buffer = io.BytesIO()
-                img.save(output_buffer, 'JPEG', quality=95)
-                ext = 'jpg'
-            else:
-                output_buffer = io.BytesIO(pix.tobytes(img_format_lower))
-                ext = 'png'
-                
-            output_buffer.seek(0)
+            img_bytes, ext = _render_page(doc, pages[0], img_format, dpi)
             doc.close()
-            return output_buffer.getvalue(), 1, ext
+            if on_progress:
+                on_progress(1, 1)
+            return img_bytes, 1, ext
 
-        # Se for mais de 1 página, cria ZIP
-        zip_buffer = io.BytesIO()
+        # Se for mais de 1 página, cria ZIP. PNG/JPEG já são comprimidos:
+        # ZIP_STORED evita gastar CPU comprimindo de novo sem ganho de tamanho
+        zip_buffer = output if output is not None else io.BytesIO()
         
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for i in range(total_pages):
-                page = doc[i]
-                matrix = fitz.Matrix(dpi/72, dpi/72)
-                pix = page.get_pixmap(matrix=matrix)
-                
-                # Converter para PIL
-                img_data = pix.tobytes(img_format.lower())
-                img = Image.open(io.BytesIO(img_data))
-                
-                # Salvar em buffer
-                img_buffer = io.BytesIO()
-                ext = img_format.lower()
-                
-                if img_format.upper() == 'JPEG':
-                    img = img.convert('RGB')
-                    img.save(img_buffer, 'JPEG', quality=95)
-                    ext = 'jpg'
-                else:
-                    img.save(img_buffer, 'PNG')
-                    ext = 'png'
-                
-                img_buffer.seek(0)
+        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED) as zipf:
+            rendered = _iter_rendered_pages(pdf_bytes, doc, img_format, dpi, workers, chunk_size, pages)
+            for done, (i, img_bytes, ext) in enumerate(rendered, start=1):
                 file_name = f"pagina_{i+1:03d}.{ext}"
-                zipf.writestr(file_name, img_buffer.read())
+                zipf.writestr(file_name, img_bytes)
+                if on_progress:
+                    on_progress(done, total_pages)
                 
         doc.close()
         zip_buffer.seek(0)
+        if output is not None:
+            return output, total_pages, 'zip'
         return zip_buffer.getvalue(), total_pages, 'zip'
         
     except Exception as e:
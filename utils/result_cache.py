@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+from utils.sqlite_store import CACHE_ROOT, SqliteStore, shared_instance
+
+DEFAULT_CACHE_DIR = os.path.join(CACHE_ROOT, "results")
+DEFAULT_TEXT_CACHE_DIR = os.path.join(CACHE_ROOT, "texts")
+
+# Blocos lidos ao calcular o hash de arquivos
+HASH_CHUNK = 1024 * 1024
+
+
+class ResultCache(SqliteStore):
+    """
+    Cache em disco de resultados de operações (PDF, imagens), endereçado pelo
+    conteúdo: a chave é o SHA-256 dos bytes de entrada mais os parâmetros da
+    operação. Cada resultado fica num arquivo próprio; um índice SQLite guarda
+    tamanho, metadados e último acesso. Ao passar de `max_bytes` (ou de
+    `max_entries`, se informado), os resultados usados há mais tempo são
+    removidos (LRU).
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=2 * 1024 ** 3, max_entries=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        super().__init__(os.path.join(cache_dir, "index.sqlite3"))
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                meta TEXT NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(operation, inputs, **params):
+        """
+        Chave do resultado: SHA-256 de `operation`, dos parâmetros e do
+        conteúdo de `inputs` (bytes ou file-likes, lidos em blocos desde o início).
+        """
+        h = hashlib.sha256(operation.encode())
+        h.update(json.dumps(params, sort_keys=True, default=str).encode())
+        for item in inputs:
+            if isinstance(item, (bytes, bytearray, memoryview)):
+                h.update(b"%d:" % len(item))
+                h.update(item)
+                continue
+            item.seek(0)
+            size = 0
+            for block in iter(lambda: item.read(HASH_CHUNK), b""):
+                h.update(block)
+                size += len(block)
+            h.update(b":%d" % size)
+            item.seek(0)
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key):
+        """Retorna (caminho_do_resultado, metadados) ou None se não houver."""
+        with self._lock:
+            row = self._conn.execute("SELECT meta FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            path = self._path(key)
+            if not os.path.exists(path):
+                # Arquivo removido por fora: descarta a entrada
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return path, json.loads(row[0])
+
+    def get_bytes(self, key):
+        """Como `get`, mas retorna (bytes, metadados)."""
+        hit = self.get(key)
+        if hit is None:
+            return None
+        path, meta = hit
+        with open(path, "rb") as f:
+            return f.read(), meta
+
+    def put(self, key, data, meta=None):
+        """Guarda `data` (bytes ou file-like lido desde o início) sob `key`."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Grava num nome temporário e renomeia: leitores nunca veem arquivo parcial
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                f.write(data)
+            else:
+                data.seek(0)
+                shutil.copyfileobj(data, f, HASH_CHUNK)
+                data.seek(0)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (key, size, json.dumps(meta or {}), time.time()),
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self):
+        total, count = self._conn.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM results").fetchone()
+        max_entries = self.max_entries or count
+        if total <= self.max_bytes and count <= max_entries:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM results ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes and count <= max_entries:
+                break
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            count -= 1
+
+    def clear(self):
+        """Remove todos os resultados do cache."""
+        with self._lock:
+            for (key,) in self._conn.execute("SELECT key FROM results").fetchall():
+                try:
+                    os.remove(self._path(key))
+                except FileNotFoundError:
+                    pass
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+
+
+@shared_instance
+def get_result_cache():
+    """Retorna a instância compartilhada do cache de resultados no diretório padrão."""
+    return ResultCache()
+
+
+@shared_instance
+def get_text_cache():
+    """
+    Instância compartilhada do cache de textos (transcrições, resumos), em
+    diretório próprio: resultados pequenos e caros de gerar não disputam
+    espaço com imagens e PDFs.
+    """
+    return ResultCache(DEFAULT_TEXT_CACHE_DIR, max_bytes=256 * 1024 ** 2, max_entries=20_000)
@@ -0,0 +1,41 @@
+import functools
+import os
+import sqlite3
+import threading
+
+# Pasta dos índices e caches persistentes da aplicação
+CACHE_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "productivityHub")
+
+
+class SqliteStore:
+    """
+    Base dos índices/caches em SQLite: abre a conexão (criando a pasta, se
+    preciso) em modo WAL e guarda um lock para serializar o acesso a ela.
+    """
+
+    def __init__(self, db_path):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # O Streamlit executa cada rerun numa thread diferente
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+
+def shared_instance(factory):
+    """
+    Decorador para os `get_*()` das instâncias compartilhadas: `factory` é
+    chamada uma única vez (com lock) e o resultado é reaproveitado.
+    """
+    instance = None
+    lock = threading.Lock()
+
+    @functools.wraps(factory)
+    def get():
+        nonlocal instance
+        with lock:
+            if instance is None:
+                instance = factory()
+            return instance
+
+    return get